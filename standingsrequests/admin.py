@@ -3,7 +3,13 @@ from django.db.models import Count
 from eveuniverse.models import EveEntity
 
 from .core import ContactType
-from .models import ContactSet, StandingRequest, StandingRevocation
+from .models import (
+    ContactSet,
+    StandingRequest,
+    StandingRevocation,
+    TaskRun,
+    TaskRunStage,
+)
 
 
 class AbstractStandingsRequestAdmin(admin.ModelAdmin):
@@ -77,3 +83,46 @@ class ContactSetAdmin(admin.ModelAdmin):
 
     def _contacts_count(self, obj):
         return obj.contacts_count
+
+
+class TaskRunStageInline(admin.TabularInline):
+    model = TaskRunStage
+    fields = (
+        "position",
+        "name",
+        "duration",
+        "db_queries",
+        "db_time",
+        "esi_calls",
+        "esi_time",
+        "rows_written",
+    )
+    readonly_fields = fields
+    extra = 0
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(TaskRun)
+class TaskRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "started_at",
+        "name",
+        "is_success",
+        "duration",
+        "db_queries",
+        "db_time",
+        "esi_calls",
+        "esi_time",
+        "rows_written",
+    )
+    list_filter = ("name", "is_success")
+    ordering = ("-started_at",)
+    inlines = (TaskRunStageInline,)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
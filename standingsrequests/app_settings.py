@@ -4,6 +4,14 @@ from app_utils.django import clean_setting
 
 from .constants import OperationMode
 
+# Character affiliations will be fetched again from ESI
+# after the configured hours.
+SR_AFFILIATIONS_STALE_HOURS = clean_setting("SR_AFFILIATIONS_STALE_HOURS", 24)
+
+# Max number of character affiliations fetched from ESI per run.
+# Remaining stale affiliations will be fetched by the next run. 0 = no limit
+SR_AFFILIATIONS_MAX_PER_RUN = clean_setting("SR_AFFILIATIONS_MAX_PER_RUN", 20000)
+
 # switch to enable/disable ability to request standings for corporations
 SR_CORPORATIONS_ENABLED = clean_setting("SR_CORPORATIONS_ENABLED", True)
 
@@ -16,15 +24,32 @@ SR_ESI_TIMEOUT_ENABLED = clean_setting("SR_ESI_TIMEOUT_ENABLED", True)
 # Send notifications to users about the results of standings requests
 SR_NOTIFICATIONS_ENABLED = clean_setting("SR_NOTIFICATIONS_ENABLED", True)
 
+# Merge all notifications to a user from the same standings sync into one
+SR_NOTIFICATIONS_DIGEST_ENABLED = clean_setting(
+    "SR_NOTIFICATIONS_DIGEST_ENABLED", False
+)
+
 # Automatically sync standing for alt characters known to Auth
 # that have standing in-game
 SR_SYNC_BLUE_ALTS_ENABLED = clean_setting("SR_SYNC_BLUE_ALTS_ENABLED", True)
 
+# Validate the requests of a user when tokens, character ownerships,
+# state or groups of that user change
+SR_INCREMENTAL_VALIDATION_ENABLED = clean_setting(
+    "SR_INCREMENTAL_VALIDATION_ENABLED", True
+)
+
 # Select the entity type of your standings master
 SR_OPERATION_MODE = clean_setting(
     "SR_OPERATION_MODE", str(OperationMode.ALLIANCE), choices=OperationMode.values
 )
 
+# Number of shards for processing requests after a standings sync.
+# With more than one shard requests are split by contact ID and processed
+# in parallel by several celery workers.
+# Each shard sends its own notifications, so digests are created per shard.
+SR_PROCESS_REQUESTS_SHARDS = clean_setting("SR_PROCESS_REQUESTS_SHARDS", 1)
+
 # This is a map, where the key is the State the user is in
 # and the value is a list of required scopes to check
 SR_REQUIRED_SCOPES = getattr(
@@ -35,13 +60,37 @@ SR_REQUIRED_SCOPES = getattr(
 
 # Standing data will be considered stale and removed from the local
 # database after the configured hours.
-# The latest standings data will never be purged, no matter how old it is
+# The active standings data will never be purged, no matter how old it is
 SR_STANDINGS_STALE_HOURS = clean_setting("SR_STANDINGS_STALE_HOURS", 48)
 
+# Max seconds a run of the purge task may spend on deleting stale standings data.
+# Remaining stale data will be deleted by the next run.
+SR_STANDINGS_PURGE_TIME_BUDGET = clean_setting("SR_STANDINGS_PURGE_TIME_BUDGET", 300)
+
+# Keep a binary snapshot of the active standings in a file,
+# so standings can be looked up without querying the database.
+# Requires SR_STANDINGS_SNAPSHOT_PATH.
+SR_STANDINGS_SNAPSHOT_ENABLED = clean_setting("SR_STANDINGS_SNAPSHOT_ENABLED", True)
+
+# Path of the standings snapshot file. All processes on a host share this file.
+# Required for snapshots. The directory should only be writable by Auth.
+SR_STANDINGS_SNAPSHOT_PATH = clean_setting(
+    "SR_STANDINGS_SNAPSHOT_PATH", None, required_type=str
+)
+
 # Max hours to wait for a standing to be effective after being marked actioned
 # Non effective standing requests will be reset when this timeout expires.
 SR_STANDING_TIMEOUT_HOURS = clean_setting("SR_STANDING_TIMEOUT_HOURS", 24)
 
+# Record stats like wall time, DB queries and ESI calls for all tasks.
+# Stats are logged and can be browsed on the admin site.
+SR_TASK_INSTRUMENTATION_ENABLED = clean_setting(
+    "SR_TASK_INSTRUMENTATION_ENABLED", False
+)
+
+# Recorded task stats will be removed after the configured days.
+SR_TASK_RUNS_STALE_DAYS = clean_setting("SR_TASK_RUNS_STALE_DAYS", 30)
+
 # id of character to use for updating alliance contacts - needs to be set
 STANDINGS_API_CHARID = clean_setting("STANDINGS_API_CHARID", None, required_type=int)
 
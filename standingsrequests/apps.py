@@ -9,4 +9,4 @@ class StandingsRequestsConfig(AppConfig):
     verbose_name = "%s v%s" % (__title__, __version__)
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
@@ -13,6 +13,7 @@ from app_utils.logging import LoggerAddTag
 
 from .. import __title__
 from ..providers import esi
+from .instrumentation import with_current_run
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
@@ -183,7 +184,9 @@ class EveCorporation:
         )
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
             futures = [
-                executor.submit(cls.thread_fetch_corporation, corporation_id)
+                executor.submit(
+                    with_current_run(cls.thread_fetch_corporation), corporation_id
+                )
                 for corporation_id in corporation_ids
             ]
             logger.info("Waiting for all threads fetching corporations to complete...")
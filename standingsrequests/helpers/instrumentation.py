@@ -0,0 +1,240 @@
+"""Opt-in instrumentation for tasks
+
+Records wall time, DB queries, ESI calls and rows written for each task run
+and the stages it consists of. Stats are logged and stored as TaskRun objects.
+Nothing is recorded unless SR_TASK_INSTRUMENTATION_ENABLED is set.
+"""
+
+import json
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from time import perf_counter
+from typing import Optional
+
+from django.db import connection
+from django.utils.timezone import now
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+from ..app_settings import SR_TASK_INSTRUMENTATION_ENABLED
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+_lock = threading.Lock()
+# the run of each thread, so concurrent tasks in a threaded worker are kept apart
+_local = threading.local()
+
+
+class _Stats:
+    """Stats of a task run or one of its stages."""
+
+    __slots__ = (
+        "name",
+        "duration",
+        "db_queries",
+        "db_time",
+        "esi_calls",
+        "esi_time",
+        "rows_written",
+    )
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.duration = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.esi_calls = 0
+        self.esi_time = 0.0
+        self.rows_written = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "duration": round(self.duration, 3),
+            "db_queries": self.db_queries,
+            "db_time": round(self.db_time, 3),
+            "esi_calls": self.esi_calls,
+            "esi_time": round(self.esi_time, 3),
+            "rows_written": self.rows_written,
+        }
+
+
+class _TaskRun:
+    """A running task with its stats.
+
+    Events are added to the totals and to all stages currently open,
+    so the stats of a stage include the stats of its nested stages.
+    """
+
+    def __init__(self, task_name: str) -> None:
+        self.task_name = task_name
+        self.started_at = now()
+        self.totals = _Stats(task_name)
+        self.stages = []
+        self._open_stats = [self.totals]
+
+    def start_stage(self, name: str) -> _Stats:
+        stats = _Stats(name)
+        with _lock:
+            self.stages.append(stats)
+            self._open_stats.append(stats)
+        return stats
+
+    def finish_stage(self, stats: _Stats, duration: float) -> None:
+        with _lock:
+            stats.duration = duration
+            self._open_stats.remove(stats)
+
+    def record_query(self, duration: float, rows_written: int) -> None:
+        with _lock:
+            for stats in self._open_stats:
+                stats.db_queries += 1
+                stats.db_time += duration
+                stats.rows_written += rows_written
+
+    def record_esi_call(self, duration: float) -> None:
+        with _lock:
+            for stats in self._open_stats:
+                stats.esi_calls += 1
+                stats.esi_time += duration
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if sql.lstrip()[:6].upper() in {"INSERT", "UPDATE", "DELETE"}:
+                rows_written = max(context["cursor"].rowcount, 0)
+            else:
+                rows_written = 0
+            self.record_query(perf_counter() - start, rows_written)
+
+
+def instrument_task(func):
+    """Decorator for recording the stats of a task.
+
+    Tasks called from within an instrumented task are recorded as stage.
+    """
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not SR_TASK_INSTRUMENTATION_ENABLED:
+            return func(*args, **kwargs)
+
+        if _active_run():
+            with stage(func.__name__):
+                return func(*args, **kwargs)
+
+        run = _TaskRun(func.__name__)
+        _local.run = run
+        is_success = False
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(run.execute_wrapper):
+                result = func(*args, **kwargs)
+            is_success = True
+            return result
+        finally:
+            run.totals.duration = perf_counter() - start
+            _local.run = None
+            _report_run(run, is_success)
+
+    return wrapper
+
+
+@contextmanager
+def stage(name: str):
+    """Record the stats of a stage of the current task run.
+
+    Can be used as context manager or decorator.
+    Does nothing when no instrumented task is running.
+    """
+    run = _active_run()
+    if not run:
+        yield
+        return
+
+    stats = run.start_stage(name)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        run.finish_stage(stats, perf_counter() - start)
+
+
+def with_current_run(func):
+    """Binds a function to the task run of the calling thread.
+
+    Use it for functions submitted to a thread pool,
+    so ESI calls made by the pool threads are recorded for the current run.
+    """
+    run = _active_run()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        previous_run = _active_run()
+        _local.run = run
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _local.run = previous_run
+
+    return wrapper
+
+
+def record_esi_response(response, *args, **kwargs) -> None:
+    """Response hook for requests, which records ESI calls for the current run."""
+    run = _active_run()
+    if run:
+        run.record_esi_call(response.elapsed.total_seconds())
+
+
+def _active_run() -> Optional[_TaskRun]:
+    return getattr(_local, "run", None)
+
+
+def _report_run(run: _TaskRun, is_success: bool) -> None:
+    """Log stats of a finished run and store them in the run history."""
+    from ..models import TaskRun, TaskRunStage
+
+    logger.info(
+        "Task stats: %s",
+        json.dumps(
+            {
+                "is_success": is_success,
+                **run.totals.as_dict(),
+                "stages": [stats.as_dict() for stats in run.stages],
+            }
+        ),
+    )
+    try:
+        task_run = TaskRun.objects.create(
+            started_at=run.started_at,
+            is_success=is_success,
+            **_model_fields(run.totals),
+        )
+        TaskRunStage.objects.bulk_create(
+            [
+                TaskRunStage(
+                    task_run=task_run, position=position, **_model_fields(stats)
+                )
+                for position, stats in enumerate(run.stages, start=1)
+            ]
+        )
+    except Exception:
+        logger.exception("Failed to store stats for task %s", run.task_name)
+
+
+def _model_fields(stats: _Stats) -> dict:
+    return {
+        "name": stats.name,
+        "duration": stats.duration,
+        "db_queries": stats.db_queries,
+        "db_time": stats.db_time,
+        "esi_calls": stats.esi_calls,
+        "esi_time": stats.esi_time,
+        "rows_written": stats.rows_written,
+    }
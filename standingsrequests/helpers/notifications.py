@@ -0,0 +1,129 @@
+"""Outbox for notifications to users
+
+Notifications are collected while requests are processed
+and written in bulk afterwards instead of one by one.
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils.translation import gettext_lazy as _
+
+from allianceauth.notifications.models import Notification
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+from ..app_settings import SR_NOTIFICATIONS_DIGEST_ENABLED
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+# a digest gets the most severe level of its messages
+LEVELS_BY_SEVERITY = [
+    Notification.Level.DANGER,
+    Notification.Level.WARNING,
+    Notification.Level.SUCCESS,
+    Notification.Level.INFO,
+]
+
+
+class NotificationOutbox:
+    """Collects notifications to users and sends them in bulk.
+
+    In digest mode all notifications to the same user
+    are merged into one notification.
+    """
+
+    BULK_BATCH_SIZE = 500
+
+    def __init__(self, digest: bool = None) -> None:
+        self.digest = SR_NOTIFICATIONS_DIGEST_ENABLED if digest is None else digest
+        self._messages = defaultdict(list)
+        self._users = dict()
+
+    def __len__(self) -> int:
+        return sum(len(messages) for messages in self._messages.values())
+
+    def add(self, user, title: str, message: str = None, level: str = "info") -> None:
+        """Adds a notification to the outbox. Same params as notify()."""
+        if level not in Notification.Level:
+            level = Notification.Level.INFO
+        self._users[user.pk] = user
+        self._messages[user.pk].append((str(title), str(message or title), level))
+
+    def send(self) -> int:
+        """Sends all notifications in the outbox and empties it.
+
+        Returns the number of created notifications.
+        """
+        if not self._messages:
+            return 0
+
+        notifications = []
+        for user_pk, messages in self._messages.items():
+            user = self._users[user_pk]
+            if self.digest and len(messages) > 1:
+                notifications.append(self._create_digest(user, messages))
+            else:
+                notifications += [
+                    Notification(user=user, title=title, message=message, level=level)
+                    for title, message, level in messages
+                ]
+
+        Notification.objects.bulk_create(notifications, batch_size=self.BULK_BATCH_SIZE)
+        user_pks = set(self._messages.keys())
+        self._trim_notifications(user_pks)
+        for user_pk in user_pks:
+            Notification.objects.invalidate_user_notification_cache(user_pk)
+
+        logger.info(
+            "Sent %d notifications to %d users", len(notifications), len(user_pks)
+        )
+        self._messages.clear()
+        self._users.clear()
+        return len(notifications)
+
+    @staticmethod
+    def _create_digest(user, messages: list) -> Notification:
+        """Merges many messages for a user into one notification."""
+        levels = {level for dummy_1, dummy_2, level in messages}
+        level = next(level for level in LEVELS_BY_SEVERITY if level in levels)
+        return Notification(
+            user=user,
+            title=str(
+                _("%(title)s: %(count)d standing changes")
+                % {"title": __title__, "count": len(messages)}
+            ),
+            message="\n\n".join(
+                f"{title}\n{message}" for title, message, dummy in messages
+            ),
+            level=level,
+        )
+
+    @staticmethod
+    def _trim_notifications(user_pks: set) -> None:
+        """Removes the oldest notifications of users above the max per user."""
+        max_notifications = _max_notifications_per_user()
+        users_above_max = (
+            Notification.objects.filter(user_id__in=user_pks)
+            .values("user_id")
+            .annotate(notifications_count=Count("id"))
+            .filter(notifications_count__gt=max_notifications)
+            .values_list("user_id", flat=True)
+        )
+        for user_pk in users_above_max:
+            obsolete_pks = list(
+                Notification.objects.filter(user_id=user_pk)
+                .order_by("-timestamp", "-pk")
+                .values_list("pk", flat=True)[max_notifications:]
+            )
+            Notification.objects.filter(pk__in=obsolete_pks).delete()
+
+
+def _max_notifications_per_user() -> int:
+    """Returns the max number of notifications per user as configured for Auth."""
+    max_notifications = getattr(settings, "NOTIFICATIONS_MAX_PER_USER", None)
+    if not isinstance(max_notifications, int) or max_notifications < 0:
+        return Notification.NOTIFICATIONS_MAX_PER_USER_DEFAULT
+    return max_notifications
@@ -0,0 +1,153 @@
+"""Binary snapshot of the standings of the active contact set
+
+The snapshot file contains the sorted entity IDs and the standings
+of all contacts as fixed-width arrays. All processes on a host memory map
+the same file and look up standings by binary search without querying the database.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Optional
+
+from allianceauth.services.hooks import get_extension_logger
+from app_utils.logging import LoggerAddTag
+
+from .. import __title__
+from ..app_settings import SR_STANDINGS_SNAPSHOT_ENABLED, SR_STANDINGS_SNAPSHOT_PATH
+
+logger = LoggerAddTag(get_extension_logger(__name__), __title__)
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class StandingsSnapshot:
+    """A memory mapped snapshot of the standings of a contact set.
+
+    File layout: header, entity IDs as int64, standings as float64
+    """
+
+    MAGIC = b"SRSS"
+    FORMAT_VERSION = 1
+    # magic, format version, contact set ID, contact set date in µs, contacts count
+    HEADER = struct.Struct("=4sIqqq")
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, format_version, set_id, set_date, count = self.HEADER.unpack_from(
+            self._mmap
+        )
+        if magic != self.MAGIC or format_version != self.FORMAT_VERSION:
+            raise ValueError(f"{path}: Not a valid standings snapshot")
+        self.version = (set_id, set_date)
+        self.count = count
+        ids_start = self.HEADER.size
+        standings_start = ids_start + count * 8
+        data = memoryview(self._mmap)
+        self._entity_ids = data[ids_start:standings_start].cast("q")
+        self._standings = data[standings_start : standings_start + count * 8].cast("d")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def standing(self, entity_id: int) -> Optional[float]:
+        """returns standing for an entity or None if it is not a contact"""
+        pos = bisect_left(self._entity_ids, entity_id)
+        if pos < self.count and self._entity_ids[pos] == entity_id:
+            return self._standings[pos]
+        return None
+
+    def standings(self, entity_ids: Iterable[int]) -> dict:
+        """returns standings for all given entities, which are contacts"""
+        result = dict()
+        for entity_id in entity_ids:
+            standing = self.standing(entity_id)
+            if standing is not None:
+                result[entity_id] = standing
+        return result
+
+    @classmethod
+    def write(cls, path: str, version: tuple, contacts: Iterable[tuple]) -> None:
+        """Writes a new snapshot file from pairs of entity ID and standing.
+
+        The file is replaced atomically, so readers never see a partial file.
+        """
+        contacts = sorted(contacts)
+        entity_ids = array("q", [entity_id for entity_id, _ in contacts])
+        standings = array("d", [standing for _, standing in contacts])
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(
+                    cls.HEADER.pack(
+                        cls.MAGIC, cls.FORMAT_VERSION, *version, len(entity_ids)
+                    )
+                )
+                entity_ids.tofile(file)
+                standings.tofile(file)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def snapshot_version(contact_set) -> tuple:
+    """returns the snapshot version for a contact set"""
+    return contact_set.pk, int(contact_set.date.timestamp() * 1_000_000)
+
+
+def write_snapshot(contact_set) -> None:
+    """Writes a snapshot for the given contact set."""
+    if not _is_enabled():
+        return
+    StandingsSnapshot.write(
+        SR_STANDINGS_SNAPSHOT_PATH,
+        snapshot_version(contact_set),
+        contact_set.contacts.values_list("eve_entity_id", "standing"),
+    )
+    logger.info("Wrote standings snapshot for %r", contact_set)
+
+
+def get_snapshot(contact_set) -> Optional[StandingsSnapshot]:
+    """returns the snapshot for the given contact set if available
+
+    The snapshot is loaded again when the file has a new version.
+    Snapshots are only written by the standings sync, never from here.
+    Returns None when snapshots are disabled or no snapshot exists
+    for the contact set.
+    """
+    global _snapshot
+
+    if not _is_enabled():
+        return None
+
+    version = snapshot_version(contact_set)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        snapshot = _load_snapshot()
+        if snapshot is None or snapshot.version != version:
+            return None
+        _snapshot = snapshot
+    return snapshot
+
+
+def _is_enabled() -> bool:
+    return bool(SR_STANDINGS_SNAPSHOT_ENABLED and SR_STANDINGS_SNAPSHOT_PATH)
+
+
+def _load_snapshot() -> Optional[StandingsSnapshot]:
+    try:
+        return StandingsSnapshot(SR_STANDINGS_SNAPSHOT_PATH)
+    except (OSError, ValueError, struct.error):
+        return None
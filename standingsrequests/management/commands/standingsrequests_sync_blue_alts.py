@@ -13,7 +13,7 @@ class Command(BaseCommand):
 
     def _create_requests(self):
         created_counter = (
-            ContactSet.objects.latest().generate_standing_requests_for_blue_alts()
+            ContactSet.objects.current().generate_standing_requests_for_blue_alts()
         )
         self.stdout.write(f"Created a total of {created_counter} standing requests.")
 
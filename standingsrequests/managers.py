@@ -1,31 +1,56 @@
-from typing import Tuple
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from time import perf_counter, sleep
+from typing import Iterable, Iterator, Tuple
 
 from bravado.exception import HTTPError
 
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import Case, Q, Value, When
+from django.db.models import Case, F, Max, Min, OuterRef, Q, Subquery, Value, When
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 from esi.models import Token
 from eveuniverse.models import EveEntity
 
 from allianceauth.eveonline.models import EveCharacter
-from allianceauth.notifications import notify
 from allianceauth.services.hooks import get_extension_logger
+from app_utils.django import users_with_permission
 from app_utils.helpers import chunks
 from app_utils.logging import LoggerAddTag
 
 from . import __title__
-from .app_settings import SR_NOTIFICATIONS_ENABLED
+from .app_settings import (
+    SR_AFFILIATIONS_MAX_PER_RUN,
+    SR_AFFILIATIONS_STALE_HOURS,
+    SR_NOTIFICATIONS_ENABLED,
+    SR_STANDING_TIMEOUT_HOURS,
+)
 from .constants import OperationMode
 from .core import BaseConfig, ContactType
+from .helpers.instrumentation import stage, with_current_run
+from .helpers.notifications import NotificationOutbox
+from .helpers.snapshot import write_snapshot
 from .providers import esi
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
 
 class ContactSetManager(models.Manager):
+    # max number of contacts written to the database in one batch
+    BULK_BATCH_SIZE = 500
+
+    # max range of contact primary keys deleted in one batch when purging
+    PURGE_BATCH_SIZE = 5000
+
+    # cache key and timeout for the handle of the currently active contact set
+    CURRENT_HANDLE_CACHE_KEY = "standingsrequests_current_contact_set_v1"
+    CURRENT_HANDLE_CACHE_TIMEOUT = 3600 * 24
+
     def create_new_from_api(self) -> object:
         """fetches contacts with standings for configured alliance
         or corporation from ESI and stores them as newly created ContactSet
@@ -42,26 +67,195 @@ class ContactSetManager(models.Manager):
         if not token:
             logger.warning("Token for standing char could not be found")
             return None
+        # fetch phase: all ESI requests incl. name resolution, no transaction
         try:
-            contacts_wrap = _ContactsWrapper(token, owner_character)
+            with stage("fetch_contacts"):
+                contacts_wrap = _ContactsWrapper(token, owner_character)
         except HTTPError as ex:
             logger.exception(
                 "APIError occurred while trying to query api server: %s", ex
             )
             return None
 
-        with transaction.atomic():
-            contacts_set = self.create()
-            self._add_labels_from_api(contacts_set, contacts_wrap.labels)
+        try:
+            current_set = self.current()
+        except self.model.DoesNotExist:
+            current_set = None
+        if current_set and current_set.content_hash == contacts_wrap.digest:
+            logger.info(
+                "Contacts have not changed since last sync. Keeping %r", current_set
+            )
+            current_set.verified_at = now()
+            current_set.save(update_fields=["verified_at"])
+            self.refresh_current_handle()
+            self._write_snapshot(current_set)
+            return current_set
+
+        # write phase: fill a staging set, which becomes visible on activation
+        with transaction.atomic(), stage("store_contacts"):
+            contacts_set = self.create(content_hash=contacts_wrap.digest)
+            self._add_labels_from_api(contacts_set, contacts_wrap.labels.values())
             self._add_contacts_from_api(contacts_set, contacts_wrap.contacts)
 
+        contacts_set.activate()
+        self._write_snapshot(contacts_set)
         return contacts_set
 
+    @staticmethod
+    def _write_snapshot(contacts_set) -> None:
+        try:
+            write_snapshot(contacts_set)
+        except OSError:
+            logger.exception("Failed to write standings snapshot")
+
+    def current(self) -> object:
+        """returns the currently active contact set
+
+        The contact set is restored from the cached handle,
+        so usually no database query is needed.
+
+        Raises ContactSet.DoesNotExist if no contact set is active
+        """
+        handle = self.current_handle()
+        field_names = ["id", "date", "name", "content_hash", "verified_at"]
+        return self.model.from_db(
+            self.db, field_names, [handle[name] for name in field_names]
+        )
+
+    def current_handle(self) -> dict:
+        """returns a handle for the currently active contact set from cache
+
+        The handle is a dict with the fields of the contact set
+        and the count of its contacts as "contacts_count".
+        Contacts of a set never change after activation,
+        so the ID of the set also serves as version of the current contacts.
+
+        Raises ContactSet.DoesNotExist if no contact set is active
+        """
+        handle = cache.get(self.CURRENT_HANDLE_CACHE_KEY)
+        if handle is None:
+            handle = self._current_handle_from_db()
+            # does not overwrite a newer handle stored by another process
+            cache.add(
+                self.CURRENT_HANDLE_CACHE_KEY,
+                handle,
+                self.CURRENT_HANDLE_CACHE_TIMEOUT,
+            )
+        return handle
+
+    def refresh_current_handle(self) -> None:
+        """Stores a fresh handle of the currently active contact set in the cache.
+
+        The handle is overwritten instead of deleted, so a process,
+        which read the old active set just before, can not add it again.
+        The handle is stored right away and again once the current transaction
+        is committed, so other processes see the committed state.
+        """
+        self._store_current_handle()
+        transaction.on_commit(self._store_current_handle)
+
+    def _store_current_handle(self) -> None:
+        try:
+            handle = self._current_handle_from_db()
+        except self.model.DoesNotExist:
+            cache.delete(self.CURRENT_HANDLE_CACHE_KEY)
+        else:
+            cache.set(
+                self.CURRENT_HANDLE_CACHE_KEY,
+                handle,
+                self.CURRENT_HANDLE_CACHE_TIMEOUT,
+            )
+
+    def _current_handle_from_db(self) -> dict:
+        from .models import ActiveContactSet
+
+        try:
+            pointer = ActiveContactSet.objects.select_related("contact_set").get(
+                pk=ActiveContactSet.SINGLETON_PK
+            )
+        except ActiveContactSet.DoesNotExist:
+            raise self.model.DoesNotExist("No contact set is active") from None
+        contact_set = pointer.contact_set
+        return {
+            "id": contact_set.id,
+            "date": contact_set.date,
+            "name": contact_set.name,
+            "content_hash": contact_set.content_hash,
+            "verified_at": contact_set.verified_at,
+            "contacts_count": contact_set.contacts.count(),
+        }
+
+    def purge_stale(self, cutoff_date, time_budget: float = None) -> bool:
+        """Deletes all contact sets older than cutoff date
+        except the currently active contact set.
+
+        Contacts and their label relations are deleted in batches by ranges of
+        primary keys, so memory usage does not grow with the size of a contact set.
+        Purging stops when the time budget in seconds is exhausted.
+        A contact set is only deleted after all its contacts are deleted,
+        so an interrupted purge can be continued by the next run.
+
+        Returns True when all stale contact sets have been purged, else False
+        """
+        try:
+            current_set = self.current()
+        except self.model.DoesNotExist:
+            logger.warning("No contact set is active, nothing to purge")
+            return True
+
+        started = perf_counter()
+
+        def is_time_budget_exhausted() -> bool:
+            return time_budget is not None and perf_counter() - started > time_budget
+
+        stale_set_pks = list(
+            self.filter(date__lt=cutoff_date)
+            .exclude(pk=current_set.pk)
+            .order_by("date")
+            .values_list("pk", flat=True)
+        )
+        for contact_set_pk in stale_set_pks:
+            if not self._purge_contacts(contact_set_pk, is_time_budget_exhausted):
+                logger.info("Time budget exhausted. Purge will continue with next run.")
+                return False
+            self.filter(pk=contact_set_pk).delete()
+            logger.debug("Purged contact set with pk %d", contact_set_pk)
+
+        return True
+
+    def _purge_contacts(self, contact_set_pk: int, is_time_budget_exhausted) -> bool:
+        """Deletes all contacts and labels of a contact set in batches.
+
+        Returns True when completed, or False when the time budget was exhausted.
+        """
+        from .models import Contact, ContactLabel
+
+        ContactLabelRelation = Contact.labels.through
+        contacts = Contact.objects.filter(contact_set_id=contact_set_pk)
+        pk_range = contacts.aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+        if pk_range["min_pk"] is not None:
+            for start_pk in range(
+                pk_range["min_pk"], pk_range["max_pk"] + 1, self.PURGE_BATCH_SIZE
+            ):
+                if is_time_budget_exhausted():
+                    return False
+                pk_filter = {
+                    "pk__gte": start_pk,
+                    "pk__lt": start_pk + self.PURGE_BATCH_SIZE,
+                }
+                ContactLabelRelation.objects.filter(
+                    contact__in=contacts.filter(**pk_filter).values("pk")
+                ).delete()
+                contacts.filter(**pk_filter).delete()
+
+        ContactLabel.objects.filter(contact_set_id=contact_set_pk).delete()
+        return True
+
     def _add_labels_from_api(self, contact_set, labels):
         """Add the list of labels to the given ContactSet
 
         contact_set: ContactSet instance
-        labels: Label dictionary
+        labels: iterable of _ContactsWrapper.Label
         """
         from .models import ContactLabel
 
@@ -73,29 +267,64 @@ class ContactSetManager(models.Manager):
 
     def _add_contacts_from_api(self, contact_set, contacts):
         """Add all contacts to the given ContactSet
-        Labels _MUST_ be added before adding contacts
+        Labels _MUST_ be added and EveEntities for all contacts _MUST_ exist
+        before adding contacts
+
+        Contacts and their labels are written in bulk batches, so the number
+        of queries only grows with the number of batches.
 
         :param contact_set: Django ContactSet to add contacts to
         :param contacts: List of _ContactsWrapper.Contact to add
         """
         from .models import Contact
 
-        for contact in contacts:
-            eve_entity, _ = EveEntity.objects.get_or_create_esi(id=contact.id)
-            obj = Contact.objects.create(
-                contact_set=contact_set,
-                eve_entity=eve_entity,
-                standing=contact.standing,
+        label_pks = {
+            label_id: pk
+            for label_id, pk in contact_set.labels.values_list("label_id", "pk")
+        }
+        ContactLabelRelation = Contact.labels.through
+        for contacts_chunk in chunks(list(contacts), self.BULK_BATCH_SIZE):
+            Contact.objects.bulk_create(
+                [
+                    Contact(
+                        contact_set=contact_set,
+                        eve_entity_id=contact.id,
+                        standing=contact.standing,
+                    )
+                    for contact in contacts_chunk
+                ]
+            )
+            # primary keys are not returned by bulk_create on all backends
+            contact_pks = {
+                eve_entity_id: pk
+                for eve_entity_id, pk in contact_set.contacts.filter(
+                    eve_entity_id__in=[contact.id for contact in contacts_chunk]
+                ).values_list("eve_entity_id", "pk")
+            }
+            ContactLabelRelation.objects.bulk_create(
+                [
+                    ContactLabelRelation(
+                        contact_id=contact_pks[contact.id],
+                        contactlabel_id=label_pks[label_id],
+                    )
+                    for contact in contacts_chunk
+                    for label_id in contact.label_ids
+                    if label_id in label_pks
+                ],
+                ignore_conflicts=True,
             )
-            flat_labels = [label.id for label in contact.labels]
-            labels = contact_set.labels.filter(label_id__in=flat_labels)
-            obj.labels.add(*labels)
 
 
 class _ContactsWrapper:
-    """Converts raw contacts and contact labels data from ESI into an object"""
+    """Converts raw contacts and contact labels data from ESI into an object
+
+    All contacts are kept in memory as compact objects,
+    since the digest of the complete list is needed before anything is written.
+    """
 
     class Label:
+        __slots__ = ("id", "name")
+
         def __init__(self, json):
             self.id = json["label_id"]
             self.name = json["label_name"]
@@ -107,18 +336,16 @@ class _ContactsWrapper:
             return str(self)
 
     class Contact:
-        def __init__(self, json, labels, names_info):
+        """A contact. Labels are only referenced by their IDs."""
+
+        __slots__ = ("id", "name", "standing", "in_watchlist", "label_ids")
+
+        def __init__(self, json, names_info: dict = None):
             self.id = json["contact_id"]
-            self.name = names_info[self.id] if self.id in names_info else ""
+            self.name = names_info.get(self.id, "") if names_info else ""
             self.standing = json["standing"]
-            self.in_watchlist = json["in_watchlist"] if "in_watchlist" in json else None
-            self.label_ids = (
-                json["label_ids"]
-                if "label_ids" in json and json["label_ids"] is not None
-                else []
-            )
-            # list of labels
-            self.labels = [label for label in labels if label.id in self.label_ids]
+            self.in_watchlist = json.get("in_watchlist")
+            self.label_ids = tuple(json.get("label_ids") or ())
 
         def __str__(self) -> str:
             return str(self.name)
@@ -126,9 +353,12 @@ class _ContactsWrapper:
         def __repr__(self):
             return str(self)
 
+    # max number of concurrent requests when fetching pages from ESI
+    MAX_WORKERS = 10
+
     def __init__(self, token, owner_character):
         self.contacts = []
-        self.labels = []
+        self.labels = dict()  # label ID -> Label
 
         if BaseConfig.operation_mode is OperationMode.ALLIANCE:
             if not owner_character.alliance_id:
@@ -139,11 +369,12 @@ class _ContactsWrapper:
                 alliance_id=owner_character.alliance_id,
                 token=token.valid_access_token(),
             ).results()
-            self.labels = [self.Label(label) for label in labels]
-            contacts = esi.client.Contacts.get_alliances_alliance_id_contacts(
+            self.labels = self._labels_map(labels)
+            contacts_pages = self._fetch_pages(
+                esi.client.Contacts.get_alliances_alliance_id_contacts,
                 alliance_id=owner_character.alliance_id,
                 token=token.valid_access_token(),
-            ).results()
+            )
 
         elif BaseConfig.operation_mode is OperationMode.CORPORATON:
             labels = (
@@ -152,21 +383,69 @@ class _ContactsWrapper:
                     token=token.valid_access_token(),
                 ).results()
             )
-            self.labels = [self.Label(label) for label in labels]
-            contacts = esi.client.Contacts.get_corporations_corporation_id_contacts(
+            self.labels = self._labels_map(labels)
+            contacts_pages = self._fetch_pages(
+                esi.client.Contacts.get_corporations_corporation_id_contacts,
                 corporation_id=owner_character.corporation_id,
                 token=token.valid_access_token(),
-            ).results()
+            )
         else:
             raise NotImplementedError()
 
-        logger.debug("Got %d contacts in total", len(contacts))
-        entity_ids = [contact["contact_id"] for contact in contacts]
-        resolver = EveEntity.objects.bulk_resolve_names(entity_ids)
-        self.contacts = [
-            self.Contact(contact, self.labels, resolver._names_map)
-            for contact in contacts
-        ]
+        # pages are converted as they arrive, so raw ESI data is not kept around
+        for page in contacts_pages:
+            self.contacts += [self.Contact(contact) for contact in page]
+        logger.debug("Got %d contacts in total", len(self.contacts))
+        resolver = EveEntity.objects.bulk_resolve_names(
+            [contact.id for contact in self.contacts]
+        )
+        for contact in self.contacts:
+            contact.name = resolver._names_map.get(contact.id, "")
+
+    @classmethod
+    def _labels_map(cls, labels: list) -> dict:
+        return {label.id: label for label in map(cls.Label, labels)}
+
+    @classmethod
+    def _fetch_pages(cls, endpoint, **kwargs) -> Iterator[list]:
+        """Fetches all pages from a paginated ESI endpoint.
+
+        The first page is fetched to learn the total number of pages.
+        All remaining pages are fetched concurrently
+        and each page is yielded as soon as it arrives.
+        """
+        operation = endpoint(page=1, **kwargs)
+        operation.request_config.also_return_response = True
+        data, response = operation.result()
+        yield data
+        pages_count = int(response.headers.get("X-Pages", 1))
+        if pages_count > 1:
+            logger.debug("Fetching %d more pages from ESI", pages_count - 1)
+            with ThreadPoolExecutor(max_workers=cls.MAX_WORKERS) as executor:
+                futures = [
+                    executor.submit(
+                        with_current_run(cls._fetch_page), endpoint, page, kwargs
+                    )
+                    for page in range(2, pages_count + 1)
+                ]
+                for future in as_completed(futures):
+                    yield future.result()
+
+    @staticmethod
+    def _fetch_page(endpoint, page: int, kwargs: dict) -> list:
+        return endpoint(page=page, **kwargs).result()
+
+    @property
+    def digest(self) -> str:
+        """returns a stable hash of all labels and contacts"""
+        data = {
+            "labels": sorted([label.id, label.name] for label in self.labels.values()),
+            "contacts": sorted(
+                [contact.id, contact.standing, sorted(contact.label_ids)]
+                for contact in self.contacts
+            ),
+        }
+        return hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
 
 
 class ContactQuerySet(models.QuerySet):
@@ -199,6 +478,29 @@ class AbstractStandingsRequestQuerySet(models.QuerySet):
             )
         )
 
+    def bulk_mark_actioned(self, user: User, date: datetime = None) -> int:
+        """Marks all requests as actioned by user with one update.
+
+        Returns the number of updated requests.
+        """
+        return self.update(action_by=user, action_date=date if date else now())
+
+    def bulk_mark_effective(self, date: datetime = None) -> int:
+        """Marks all requests as effective with one update.
+
+        Returns the number of updated requests.
+        """
+        return self.update(is_effective=True, effective_date=date if date else now())
+
+    def bulk_reset(self) -> int:
+        """Resets all requests to their initial state with one update.
+
+        Returns the number of updated requests.
+        """
+        return self.update(
+            is_effective=False, effective_date=None, action_by=None, action_date=None
+        )
+
 
 class AbstractStandingsRequestManager(models.Manager):
     def filter_characters(self) -> models.QuerySet:
@@ -210,118 +512,342 @@ class AbstractStandingsRequestManager(models.Manager):
     def get_queryset(self) -> models.QuerySet:
         return AbstractStandingsRequestQuerySet(self.model, using=self._db)
 
-    def process_requests(self) -> None:
-        """Process all the Standing requests/revocation objects"""
-        from .models import (
-            AbstractStandingsRequest,
-            StandingRequest,
-            StandingRevocation,
+    def process_requests(
+        self,
+        contact_ids: Iterable[int] = None,
+        requested_since: datetime = None,
+        contact_id_range: Tuple[int, int] = None,
+        outbox: NotificationOutbox = None,
+    ) -> None:
+        """Process all the Standing requests/revocation objects
+
+        All requests and the current standings are loaded with a few queries
+        and sorted into buckets: became effective, no longer effective
+        and unchanged. Each bucket is then applied in bulk,
+        so only changed requests cause additional queries.
+
+        Timed out requests are reset separately by reset_timed_out().
+
+        Args:
+            contact_ids: when given, only requests for these contacts are processed,
+                plus requests made since ``requested_since``
+            requested_since: datetime of the previous run
+            contact_id_range: when given, only requests for contacts in this
+                range are processed. Start is inclusive, end is exclusive
+                and both can be None for an open range.
+            outbox: when given, notifications are added to this outbox
+                and the caller is responsible for sending them
+        """
+        from .models import AbstractStandingsRequest, ContactSet
+
+        if self.model is AbstractStandingsRequest:
+            raise TypeError("Can not be called from abstract objects")
+
+        requests = self._requests_to_process(
+            contact_ids, requested_since, contact_id_range
+        )
+        try:
+            contact_set = ContactSet.objects.current()
+        except ContactSet.DoesNotExist:
+            standings = dict()
+        else:
+            standings = contact_set.contact_standings(
+                {request.contact_id for request in requests}
+            )
+
+        became_effective = []
+        no_longer_effective = []
+        for request in requests:
+            # contacts without standing are neutral
+            standing = standings.get(request.contact_id, 0)
+            if self.model.is_standing_satisfied(standing):
+                if not request.is_effective:
+                    became_effective.append(request)
+            elif request.is_effective:
+                no_longer_effective.append(request)
+
+        logger.info(
+            "%s: %d became effective, %d no longer effective, %d unchanged",
+            self.model.__name__,
+            len(became_effective),
+            len(no_longer_effective),
+            len(requests) - len(became_effective) - len(no_longer_effective),
         )
+        if not became_effective and not no_longer_effective:
+            return
+
+        changed_requests = became_effective + no_longer_effective
+        contact_ids = {request.contact_id for request in changed_requests}
+        EveEntity.objects.bulk_create_esi(contact_ids)
+        contacts = EveEntity.objects.in_bulk(contact_ids)
+        users = User.objects.in_bulk({request.user_id for request in changed_requests})
+        is_own_outbox = outbox is None
+        if is_own_outbox:
+            outbox = NotificationOutbox()
+        with transaction.atomic():
+            if became_effective:
+                self._process_became_effective(
+                    became_effective, contacts, users, outbox
+                )
+            if no_longer_effective:
+                self._process_no_longer_effective(no_longer_effective, users)
+
+        # notifications are only sent once all state changes are committed
+        if is_own_outbox:
+            outbox.send()
+
+    def reset_timed_out(self) -> int:
+        """Resets all actioned requests, which have not become effective
+        before the timeout expired and informs the involved users.
+
+        A request has timed out when it is still not effective in the first
+        contact set verified ``SR_STANDING_TIMEOUT_HOURS`` after it was actioned.
+        Requests with a satisfied standing have not timed out,
+        but have not been processed yet. They are processed instead.
+
+        Returns the number of reset requests.
+        """
+        from .models import AbstractStandingsRequest, ContactSet
 
         if self.model is AbstractStandingsRequest:
             raise TypeError("Can not be called from abstract objects")
 
+        try:
+            contact_set = ContactSet.objects.current()
+        except ContactSet.DoesNotExist:
+            logger.debug("Cannot check standing timeout, no standings available")
+            return 0
+
+        deadline = contact_set.last_verified - timedelta(
+            hours=SR_STANDING_TIMEOUT_HOURS
+        )
+        requests = list(
+            self.filter(
+                is_effective=False, action_by__isnull=False, action_date__lt=deadline
+            ).values_list("pk", "contact_id", "user_id", "action_by_id", named=True)
+        )
+        if not requests:
+            return 0
+
+        standings = contact_set.contact_standings(
+            {request.contact_id for request in requests}
+        )
+        satisfied_contact_ids = {
+            contact_id
+            for contact_id, standing in standings.items()
+            if self.model.is_standing_satisfied(standing)
+        }
+        if satisfied_contact_ids:
+            self.process_requests(satisfied_contact_ids)
+            requests = [
+                request
+                for request in requests
+                if request.contact_id not in satisfied_contact_ids
+            ]
+            if not requests:
+                return 0
+
+        contact_ids = {request.contact_id for request in requests}
+        EveEntity.objects.bulk_create_esi(contact_ids)
+        contacts = EveEntity.objects.in_bulk(contact_ids)
+        users = User.objects.in_bulk(
+            {request.user_id for request in requests}
+            | {request.action_by_id for request in requests}
+        )
+        outbox = NotificationOutbox()
+        with transaction.atomic():
+            self._process_timed_out(requests, contacts, users, outbox)
+
+        # notifications are only sent once all state changes are committed
+        outbox.send()
+        return len(requests)
+
+    def contact_id_ranges(self, shards: int) -> list:
+        """Splits the contacts of all requests and revocations into ranges
+        with about the same number of contacts each.
+
+        The first and last range are open,
+        so contacts of requests made later are also covered.
+
+        Returns a list of (start, end) tuples with inclusive start and exclusive end.
+        """
+        from .models import AbstractStandingsRequest
+
+        contact_ids = sorted(
+            AbstractStandingsRequest.objects.values_list(
+                "contact_id", flat=True
+            ).distinct()
+        )
+        shards = max(1, min(shards, len(contact_ids)))
+        boundaries = [
+            contact_ids[len(contact_ids) * num // shards] for num in range(1, shards)
+        ]
+        starts = [None] + boundaries
+        ends = boundaries + [None]
+        return list(zip(starts, ends))
+
+    def _requests_to_process(
+        self,
+        contact_ids: Iterable[int],
+        requested_since: datetime,
+        contact_id_range: Tuple[int, int] = None,
+    ) -> list:
+        """returns the requests to process as named tuples"""
+        field_names = [
+            "pk",
+            "contact_id",
+            "contact_type_id",
+            "user_id",
+            "is_effective",
+            "action_by_id",
+            "action_date",
+        ]
+        qs = self.all()
+        if contact_id_range:
+            start, end = contact_id_range
+            if start is not None:
+                qs = qs.filter(contact_id__gte=start)
+            if end is not None:
+                qs = qs.filter(contact_id__lt=end)
+        if contact_ids is None:
+            return list(qs.values_list(*field_names, named=True))
+
+        requests = dict()
+        if requested_since:
+            # requests made since the last run, which have never been processed
+            for request in qs.filter(request_date__gte=requested_since).values_list(
+                *field_names, named=True
+            ):
+                requests[request.pk] = request
+        for contact_ids_chunk in chunks(list(contact_ids), 500):
+            for request in qs.filter(contact_id__in=contact_ids_chunk).values_list(
+                *field_names, named=True
+            ):
+                requests[request.pk] = request
+        return list(requests.values())
+
+    def _process_became_effective(
+        self, requests: list, contacts: dict, users: dict, outbox: NotificationOutbox
+    ) -> None:
+        from .models import StandingRequest, StandingRevocation
+
+        if self.model is StandingRequest:
+            for pks_chunk in chunks([request.pk for request in requests], 500):
+                self.filter(pk__in=pks_chunk).bulk_mark_effective()
+        else:
+            # if this was a revocation the standing requests need to be remove
+            # to indicate that this character no longer has standing
+            for contact_ids_chunk in chunks(
+                [request.contact_id for request in requests], 500
+            ):
+                StandingRequest.objects.filter(
+                    contact_id__in=contact_ids_chunk
+                ).delete()
+                StandingRevocation.objects.filter(
+                    contact_id__in=contact_ids_chunk
+                ).delete()
+
+        if not SR_NOTIFICATIONS_ENABLED:
+            return
+
+        # send notification to user about standing change if enabled
         organization = BaseConfig.standings_source_entity()
         organization_name = organization.name if organization else ""
-        for standing_request in self.all():
-            contact, dummy = EveEntity.objects.get_or_create_esi(
-                id=standing_request.contact_id
-            )
-            is_currently_effective = standing_request.is_effective
-            is_satisfied_standing = standing_request.evaluate_effective_standing()
-            if is_satisfied_standing and not is_currently_effective:
-                if SR_NOTIFICATIONS_ENABLED:
-                    # send notification to user about standing change if enabled
-                    if standing_request.is_standing_request:
-                        notify(
-                            user=standing_request.user,
-                            title=_(
-                                "%s: Standing with %s now in effect"
-                                % (__title__, contact.name)
-                            ),
-                            message=_(
-                                "'%(organization_name)s' now has blue standing with "
-                                "your alt %(contact_category)s '%(contact_name)s'. "
-                                "Please also update the standing of "
-                                "your %(contact_category)s accordingly."
-                            )
-                            % {
-                                "organization_name": organization_name,
-                                "contact_category": contact.category,
-                                "contact_name": contact.name,
-                            },
-                        )
-                    elif standing_request.is_standing_revocation:
-                        if standing_request.user:
-                            notify(
-                                user=standing_request.user,
-                                title="%s: Standing with %s revoked"
-                                % (__title__, contact.name),
-                                message=_(
-                                    "'%(organization_name)s' no longer has "
-                                    "standing with your "
-                                    "%(contact_category)s '%(contact_name)s'. "
-                                    "Please also update the standing of "
-                                    "your %(contact_category)s accordingly."
-                                )
-                                % {
-                                    "organization_name": organization_name,
-                                    "contact_category": contact.category,
-                                    "contact_name": contact.name,
-                                },
-                            )
-
-                # if this was a revocation the standing requests need to be remove
-                # to indicate that this character no longer has standing
-                if standing_request.is_standing_revocation:
-                    StandingRequest.objects.filter(
-                        contact_id=standing_request.contact_id
-                    ).delete()
-                    StandingRevocation.objects.filter(
-                        contact_id=standing_request.contact_id
-                    ).delete()
-
-            elif is_satisfied_standing:
-                # Just catching all other contact types (corps/alliances)
-                # that are set effective
-                pass
-
-            elif not is_satisfied_standing and is_currently_effective:
-                # Effective standing no longer effective
-                logger.info(
-                    "Standing for %d is marked as effective but is not "
-                    "satisfied in game. Deleting." % standing_request.contact_id
-                )
-                standing_request.delete(
-                    reason=StandingRevocation.Reason.REVOKED_IN_GAME
+        for request in requests:
+            user = users.get(request.user_id)
+            if not user:
+                continue
+            contact = contacts[request.contact_id]
+            if self.model is StandingRequest:
+                outbox.add(
+                    user=user,
+                    title=_(
+                        "%s: Standing with %s now in effect" % (__title__, contact.name)
+                    ),
+                    message=_(
+                        "'%(organization_name)s' now has blue standing with "
+                        "your alt %(contact_category)s '%(contact_name)s'. "
+                        "Please also update the standing of "
+                        "your %(contact_category)s accordingly."
+                    )
+                    % {
+                        "organization_name": organization_name,
+                        "contact_category": contact.category,
+                        "contact_name": contact.name,
+                    },
                 )
-
             else:
-                # Check the standing hasn't been set actioned
-                # and not updated in game
-                actioned_timeout = standing_request.check_actioned_timeout()
-                if actioned_timeout is not None and actioned_timeout:
-                    logger.info(
-                        "Standing request for contact ID %d has timedout "
-                        "and will be reset" % standing_request.contact_id
+                outbox.add(
+                    user=user,
+                    title="%s: Standing with %s revoked" % (__title__, contact.name),
+                    message=_(
+                        "'%(organization_name)s' no longer has "
+                        "standing with your "
+                        "%(contact_category)s '%(contact_name)s'. "
+                        "Please also update the standing of "
+                        "your %(contact_category)s accordingly."
                     )
-                    if SR_NOTIFICATIONS_ENABLED:
-                        title = _("Standing Request for %s reset" % contact.name)
-                        message = _(
-                            "The standing request for %(contact_category)s "
-                            "'%(contact_name)s' from %(user_name)s "
-                            "has been reset as it did not appear in "
-                            "game before the timeout period expired."
-                            % {
-                                "contact_category": contact.category,
-                                "contact_name": contact.name,
-                                "user_name": standing_request.user.username,
-                            },
-                        )
-                        # Notify standing manager
-                        notify(user=actioned_timeout, title=title, message=message)
-                        # Notify the user
-                        notify(user=standing_request.user, title=title, message=message)
+                    % {
+                        "organization_name": organization_name,
+                        "contact_category": contact.category,
+                        "contact_name": contact.name,
+                    },
+                )
+
+    def _process_no_longer_effective(self, requests: list, users: dict) -> None:
+        from .models import StandingRequest, StandingRevocation
+
+        for request in requests:
+            # Effective standing no longer effective
+            logger.info(
+                "Standing for %d is marked as effective but is not "
+                "satisfied in game. Deleting." % request.contact_id
+            )
+            if self.model is StandingRequest:
+                StandingRevocation.objects.add_revocation(
+                    contact_id=request.contact_id,
+                    contact_type=self.model.contact_id_2_type(request.contact_type_id),
+                    user=users.get(request.user_id),
+                    reason=StandingRevocation.Reason.REVOKED_IN_GAME,
+                )
+
+        for pks_chunk in chunks([request.pk for request in requests], 500):
+            self.filter(pk__in=pks_chunk).delete()
+
+    def _process_timed_out(
+        self, requests: list, contacts: dict, users: dict, outbox: NotificationOutbox
+    ) -> None:
+        for request in requests:
+            logger.info(
+                "Standing request for contact ID %d has timedout "
+                "and will be reset" % request.contact_id
+            )
+        for pks_chunk in chunks([request.pk for request in requests], 500):
+            self.filter(pk__in=pks_chunk).bulk_reset()
+
+        if not SR_NOTIFICATIONS_ENABLED:
+            return
+
+        for request in requests:
+            contact = contacts[request.contact_id]
+            user = users.get(request.user_id)
+            title = _("Standing Request for %s reset" % contact.name)
+            message = _(
+                "The standing request for %(contact_category)s "
+                "'%(contact_name)s' from %(user_name)s "
+                "has been reset as it did not appear in "
+                "game before the timeout period expired."
+                % {
+                    "contact_category": contact.category,
+                    "contact_name": contact.name,
+                    "user_name": user.username if user else "",
+                },
+            )
+            # Notify standing manager
+            outbox.add(user=users[request.action_by_id], title=title, message=message)
+            # Notify the user
+            if user:
+                outbox.add(user=user, title=title, message=message)
 
     def has_pending_request(self, contact_id: int) -> bool:
         """Checks if a request is pending for the given contact_id
@@ -338,58 +864,114 @@ class AbstractStandingsRequestManager(models.Manager):
 
 
 class StandingRequestManager(AbstractStandingsRequestManager):
-    def validate_requests(self) -> int:
+    @stage("validate_requests")
+    def validate_requests(self, user_ids: Iterable[int] = None) -> int:
         """Validate all StandingsRequests and check
         that the user requesting them has permission and has API keys
         associated with the character/corp.
 
         StandingRevocation are created for invalid standing requests
 
+        Args:
+            user_ids: when given, only requests of these users are validated
+
         returns the number of invalid requests
         """
         from .models import StandingRevocation
 
         logger.debug("Validating standings requests")
-        invalid_count = 0
-        for standing_request in self.all():
-            logger.debug(
-                "Checking request for contact_id %d", standing_request.contact_id
+        requests_qs = self.all()
+        if user_ids is not None:
+            user_ids = set(user_ids)
+            requests_qs = requests_qs.filter(user_id__in=user_ids)
+        permitted_user_ids = self._user_ids_with_request_permission(user_ids)
+        requests = list(
+            requests_qs.values_list(
+                "contact_id", "contact_type_id", "user_id", named=True
             )
-            reason = StandingRevocation.Reason.NONE
-            if not standing_request.user.has_perm(self.model.REQUEST_PERMISSION_NAME):
-                logger.debug("Request is invalid, user does not have permission")
+        )
+        permitted_corporation_requests = (
+            self.model.corporation_requests_with_all_member_tokens(
+                (request.user_id, request.contact_id)
+                for request in requests
+                if request.user_id in permitted_user_ids
+                and ContactType.is_corporation(request.contact_type_id)
+            )
+        )
+        invalid_requests = []
+        for request in requests:
+            if request.user_id not in permitted_user_ids:
+                logger.debug(
+                    "Request for contact_id %d is invalid, "
+                    "user does not have permission",
+                    request.contact_id,
+                )
                 reason = StandingRevocation.Reason.LOST_PERMISSION
-                is_valid = False
 
-            elif ContactType.is_corporation(
-                standing_request.contact_type_id
-            ) and not self.model.can_request_corporation_standing(
-                standing_request.contact_id, standing_request.user
+            elif (
+                ContactType.is_corporation(request.contact_type_id)
+                and (request.user_id, request.contact_id)
+                not in permitted_corporation_requests
             ):
-                logger.debug("Request is invalid, not all corp API keys recorded.")
+                logger.debug(
+                    "Request for contact_id %d is invalid, "
+                    "not all corp API keys recorded.",
+                    request.contact_id,
+                )
                 reason = StandingRevocation.Reason.MISSING_CORP_TOKEN
-                is_valid = False
 
             else:
-                is_valid = True
+                continue
 
-            if not is_valid:
-                logger.info(
-                    "Standing request for contact_id %d no longer valid. "
-                    "Creating revocation",
-                    standing_request.contact_id,
-                )
-                StandingRevocation.objects.add_revocation(
-                    contact_id=standing_request.contact_id,
-                    contact_type=self.model.contact_id_2_type(
-                        standing_request.contact_type_id
-                    ),
-                    user=standing_request.user,
+            logger.info(
+                "Standing request for contact_id %d no longer valid. "
+                "Creating revocation",
+                request.contact_id,
+            )
+            invalid_requests.append((request, reason))
+
+        pending_contact_ids = set(
+            StandingRevocation.objects.pending_requests()
+            .filter(
+                contact_id__in=[
+                    request.contact_id for request, dummy in invalid_requests
+                ]
+            )
+            .values_list("contact_id", flat=True)
+        )
+        # revocations are multi-table models and can not be created in bulk
+        with transaction.atomic():
+            for request, reason in invalid_requests:
+                if request.contact_id in pending_contact_ids:
+                    continue
+                StandingRevocation.objects.create(
+                    contact_id=request.contact_id,
+                    contact_type_id=request.contact_type_id,
+                    user_id=request.user_id,
                     reason=reason,
                 )
-                invalid_count += 1
+                pending_contact_ids.add(request.contact_id)
 
-        return invalid_count
+        return len(invalid_requests)
+
+    def _user_ids_with_request_permission(self, user_ids: set = None) -> set:
+        """returns IDs of all active users, which have the permission to request
+        standings directly, through their groups or their state
+
+        Args:
+            user_ids: when given, only these users are checked
+        """
+        app_label, codename = self.model.REQUEST_PERMISSION_NAME.split(".")
+        try:
+            permission = Permission.objects.get(
+                content_type__app_label=app_label, codename=codename
+            )
+        except Permission.DoesNotExist:
+            return set()
+        users_qs = users_with_permission(permission).filter(is_active=True)
+        if user_ids is not None:
+            users_qs = users_qs.filter(pk__in=user_ids)
+        return set(users_qs.values_list("pk", flat=True))
 
     def create_character_request(self, user: User, character: EveCharacter) -> bool:
         """Create new character standings request for user if possible."""
@@ -404,7 +986,7 @@ class StandingRequestManager(AbstractStandingsRequestManager):
         except ObjectDoesNotExist:
             return False
         try:
-            contact_set = ContactSet.objects.latest()
+            contact_set = ContactSet.objects.current()
         except ContactSet.DoesNotExist:
             logger.warning("Failed to get a contact set")
             return False
@@ -510,39 +1092,105 @@ class StandingRevocationManager(AbstractStandingsRequestManager):
         return instance
 
 
-class CharacterAffiliationManager(models.Manager):
-    def update_evecharacter_relations(self) -> None:
-        """Update links to eve character in auth if any"""
+def _materialize_eve_entities(entity_ids: Iterable[int]) -> set:
+    """Ensures there is an EveEntity object for each of the given IDs.
 
-        eve_character_id_map = {
-            obj["character_id"]: obj["id"]
-            for obj in EveCharacter.objects.values("id", "character_id")
-        }
-        with transaction.atomic():
-            affiliations = [
-                obj for obj in self.filter(character_id__in=eve_character_id_map.keys())
-            ]
-            for affiliation in affiliations:
-                affiliation.eve_character_id = eve_character_id_map[
-                    affiliation.character_id
-                ]
-            self.bulk_update(
-                objs=affiliations, fields=["eve_character_id"], batch_size=500
+    Missing entities are created in bulk without name, so they can be referenced
+    right away. Since EveEntity uses the Eve ID as primary key,
+    the given IDs can be used as foreign keys directly.
+
+    Returns the IDs of the newly created entities, which still need to be resolved.
+    """
+    entity_ids = {int(entity_id) for entity_id in entity_ids if entity_id}
+    existing_ids = set()
+    for entity_ids_chunk in chunks(list(entity_ids), 500):
+        existing_ids |= set(
+            EveEntity.objects.filter(id__in=entity_ids_chunk).values_list(
+                "id", flat=True
             )
+        )
+    new_ids = entity_ids - existing_ids
+    if new_ids:
+        EveEntity.objects.bulk_create(
+            [EveEntity(id=entity_id) for entity_id in new_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+    return new_ids
+
+
+def _resolve_eve_entities(entity_ids: Iterable[int]) -> None:
+    """Resolves the given EveEntity objects from ESI in chunks."""
+    for entity_ids_chunk in chunks(list(entity_ids), 500):
+        EveEntity.objects.filter(id__in=entity_ids_chunk).update_from_esi()
+
+
+class CharacterAffiliationManager(models.Manager):
+    # max number of character IDs per request to ESI
+    CHUNK_SIZE = 1000
+    # max number of concurrent requests when fetching affiliations from ESI
+    MAX_WORKERS = 10
+    # max number of retries for a failed request and delay before the first retry
+    # in seconds, which doubles with every further retry
+    MAX_RETRIES = 3
+    RETRY_DELAY = 1
+
+    @stage("update_evecharacter_relations")
+    def update_evecharacter_relations(self) -> int:
+        """Update links to eve character in auth if any
+
+        Links are updated with a single statement, which only touches
+        affiliations where the link has changed.
+        Links to characters, which no longer exist in auth, are cleared.
+
+        Returns the number of updated affiliations.
+        """
+        matching_eve_character_id = Subquery(
+            EveCharacter.objects.filter(character_id=OuterRef("character_id")).values(
+                "pk"
+            )[:1]
+        )
+        updated_count = (
+            self.annotate(matching_eve_character_id=matching_eve_character_id)
+            .filter(
+                Q(eve_character__isnull=True, matching_eve_character_id__isnull=False)
+                | Q(eve_character__isnull=False, matching_eve_character_id__isnull=True)
+                | (
+                    Q(
+                        eve_character__isnull=False,
+                        matching_eve_character_id__isnull=False,
+                    )
+                    & ~Q(eve_character_id=F("matching_eve_character_id"))
+                )
+            )
+            .update(eve_character_id=matching_eve_character_id)
+        )
+        logger.info("Updated %d links to eve characters", updated_count)
+        return updated_count
 
     def update_from_esi(self) -> None:
-        """Update all character affiliations we have contacts or requests for."""
+        """Update character affiliations we have contacts or requests for.
+
+        Only new and stale affiliations are fetched from ESI,
+        up to SR_AFFILIATIONS_MAX_PER_RUN per run.
+        """
         character_ids = self._gather_character_ids()
         if character_ids:
-            affiliations = self._fetch_characters_affiliation_from_esi(character_ids)
-            if affiliations:
-                self._store_affiliations(affiliations)
+            character_ids_to_fetch = self._character_ids_to_fetch(character_ids)
+            if character_ids_to_fetch:
+                affiliations = self._fetch_characters_affiliation_from_esi(
+                    character_ids_to_fetch
+                )
+            else:
+                affiliations = []
+            self._store_affiliations(affiliations, character_ids)
 
+    @stage("gather_character_ids")
     def _gather_character_ids(self) -> list:
         from .models import ContactSet, StandingRequest, StandingRevocation
 
         try:
-            contact_set = ContactSet.objects.latest()
+            contact_set = ContactSet.objects.current()
         except ContactSet.DoesNotExist:
             logger.warning("Could not find a contact set")
             return []
@@ -566,63 +1214,208 @@ class CharacterAffiliationManager(models.Manager):
             character_ids_contacts | character_ids_requests | character_ids_revocations
         )
 
-    def _fetch_characters_affiliation_from_esi(self, character_ids) -> list:
-        chunk_size = 1000
-        affiliations = []
-        for character_ids_chunk in chunks(character_ids, chunk_size):
-            try:
-                response = esi.client.Character.post_characters_affiliation(
-                    characters=character_ids_chunk
-                ).results()
-            except HTTPError:
-                logger.exception("Could not fetch character affiliations from ESI")
-                return []
-            else:
-                affiliations += response
-        return affiliations
+    @stage("select_affiliations_to_fetch")
+    def _character_ids_to_fetch(self, character_ids: list) -> list:
+        """returns IDs of characters, which affiliation needs to be fetched.
 
-    def _store_affiliations(self, affiliations) -> None:
-        affiliation_objects = list()
-        for affiliation in affiliations:
-            character, _ = EveEntity.objects.get_or_create(
-                id=affiliation["character_id"]
-            )
-            corporation, _ = EveEntity.objects.get_or_create(
-                id=affiliation["corporation_id"]
+        Characters with pending requests come first, then characters
+        without affiliation and then characters with stale affiliations,
+        oldest first. The list is capped at SR_AFFILIATIONS_MAX_PER_RUN.
+        """
+        from .models import AbstractStandingsRequest
+
+        character_ids = set(character_ids)
+        pending_ids = (
+            set(
+                AbstractStandingsRequest.objects.pending_requests()
+                .filter(contact_type_id__in=ContactType.character_ids)
+                .values_list("contact_id", flat=True)
             )
-            if affiliation.get("alliance_id"):
-                alliance, _ = EveEntity.objects.get_or_create(
-                    id=affiliation["alliance_id"]
+            & character_ids
+        )
+        last_checked = dict(self.values_list("character_id", "last_checked"))
+        new_ids = character_ids - last_checked.keys() - pending_ids
+        stale_before = now() - timedelta(hours=SR_AFFILIATIONS_STALE_HOURS)
+        stale_ids = sorted(
+            (
+                character_id
+                for character_id in character_ids & last_checked.keys()
+                if character_id not in pending_ids
+                and (
+                    last_checked[character_id] is None
+                    or last_checked[character_id] < stale_before
                 )
-            else:
-                alliance = None
-            if affiliation.get("faction_id"):
-                faction, _ = EveEntity.objects.get_or_create(
-                    id=affiliation["faction_id"]
+            ),
+            key=lambda character_id: (
+                last_checked[character_id] or datetime.min.replace(tzinfo=timezone.utc)
+            ),
+        )
+        result = sorted(pending_ids) + sorted(new_ids) + stale_ids
+        if SR_AFFILIATIONS_MAX_PER_RUN and len(result) > SR_AFFILIATIONS_MAX_PER_RUN:
+            result = result[:SR_AFFILIATIONS_MAX_PER_RUN]
+        logger.info(
+            "Fetching affiliations for %d of %d characters: "
+            "%d with pending requests, %d new, %d stale",
+            len(result),
+            len(character_ids),
+            len(pending_ids),
+            len(new_ids),
+            len(stale_ids),
+        )
+        return result
+
+    @stage("fetch_affiliations")
+    def _fetch_characters_affiliation_from_esi(self, character_ids) -> list:
+        """Fetches affiliations in chunks, which are requested concurrently.
+
+        Chunks, which still fail after all retries are skipped,
+        so the affiliations of all other chunks can be stored.
+        """
+        character_ids_chunks = list(chunks(list(character_ids), self.CHUNK_SIZE))
+        affiliations = []
+        failed_chunks_count = 0
+        # make sure client is loaded before starting threads
+        esi.client
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    with_current_run(self._fetch_affiliations_chunk),
+                    character_ids_chunk,
                 )
-            else:
-                faction = None
-            affiliation_objects.append(
-                self.model(
-                    character=character,
-                    corporation=corporation,
-                    alliance=alliance,
-                    faction=faction,
+                for character_ids_chunk in character_ids_chunks
+            ]
+            for future in as_completed(futures):
+                try:
+                    affiliations += future.result()
+                except HTTPError:
+                    logger.exception("Could not fetch character affiliations from ESI")
+                    failed_chunks_count += 1
+
+        if failed_chunks_count:
+            logger.warning(
+                "Failed to fetch %d of %d chunks of character affiliations",
+                failed_chunks_count,
+                len(character_ids_chunks),
+            )
+        return affiliations
+
+    def _fetch_affiliations_chunk(self, character_ids: list) -> list:
+        """Fetches affiliations for a chunk of characters.
+
+        Server errors and rate limits are retried with backoff,
+        all other errors are raised immediately.
+        """
+        for retry in range(self.MAX_RETRIES + 1):
+            try:
+                return esi.client.Character.post_characters_affiliation(
+                    characters=character_ids
+                ).results()
+            except HTTPError as ex:
+                if retry == self.MAX_RETRIES or not self._is_retryable(ex):
+                    raise
+                delay = self.RETRY_DELAY * 2 ** retry
+                logger.warning(
+                    "Failed to fetch character affiliations from ESI. "
+                    "Retrying in %d seconds",
+                    delay,
                 )
+                sleep(delay)
+
+    @staticmethod
+    def _is_retryable(ex: HTTPError) -> bool:
+        """Returns True if the request failed due to a server error or rate limit."""
+        return ex.status_code in {420, 429} or 500 <= ex.status_code < 600
+
+    @stage("store_affiliations")
+    def _store_affiliations(
+        self, affiliations, character_ids: Iterable[int] = None
+    ) -> None:
+        """Stores fetched affiliations by comparing them with the stored ones.
+
+        New affiliations are created, changed affiliations are updated
+        and affiliations of characters no longer tracked are deleted.
+        For unchanged affiliations only the time of the last check is updated.
+
+        Args:
+            affiliations: affiliations fetched from ESI
+            character_ids: IDs of all tracked characters.
+                Defaults to the characters of the fetched affiliations.
+        """
+        fetched = {
+            affiliation["character_id"]: (
+                affiliation["corporation_id"],
+                affiliation.get("alliance_id") or None,
+                affiliation.get("faction_id") or None,
             )
+            for affiliation in affiliations
+        }
+        new_entity_ids = _materialize_eve_entities(
+            list(fetched.keys())
+            + [entity_id for ids in fetched.values() for entity_id in ids]
+        )
+        stored = {
+            obj[0]: obj[1:]
+            for obj in self.values_list(
+                "character_id", "corporation_id", "alliance_id", "faction_id"
+            )
+        }
+        new_ids = fetched.keys() - stored.keys()
+        changed_ids = {
+            character_id
+            for character_id in fetched.keys() & stored.keys()
+            if fetched[character_id] != stored[character_id]
+        }
+        tracked_ids = fetched.keys() if character_ids is None else set(character_ids)
+        obsolete_ids = list(stored.keys() - tracked_ids)
+        updated = now()
         with transaction.atomic():
-            self.all().delete()
-            self.bulk_create(affiliation_objects, batch_size=500)
-
-        EveEntity.objects.bulk_create_esi(
-            filter(
-                lambda x: x is not None,
+            for character_ids_chunk in chunks(obsolete_ids, 500):
+                self.filter(character_id__in=character_ids_chunk).delete()
+            self.bulk_create(
                 [
-                    affiliation["character_id"],
-                    affiliation["corporation_id"],
-                    affiliation["alliance_id"],
+                    self._affiliation_from_ids(character_id, *fetched[character_id])
+                    for character_id in new_ids
                 ],
+                batch_size=500,
             )
+            self.bulk_update(
+                [
+                    self._affiliation_from_ids(
+                        character_id, *fetched[character_id], updated=updated
+                    )
+                    for character_id in changed_ids
+                ],
+                fields=["corporation", "alliance", "faction", "updated"],
+                batch_size=500,
+            )
+            for character_ids_chunk in chunks(list(fetched.keys()), 500):
+                self.filter(character_id__in=character_ids_chunk).update(
+                    last_checked=updated
+                )
+        logger.info(
+            "Stored character affiliations: %d new, %d changed, %d removed",
+            len(new_ids),
+            len(changed_ids),
+            len(obsolete_ids),
+        )
+
+        if new_entity_ids:
+            _resolve_eve_entities(new_entity_ids)
+
+    def _affiliation_from_ids(
+        self,
+        character_id: int,
+        corporation_id: int,
+        alliance_id: int,
+        faction_id: int,
+        **kwargs,
+    ) -> models.Model:
+        return self.model(
+            character_id=character_id,
+            corporation_id=corporation_id,
+            alliance_id=alliance_id,
+            faction_id=faction_id,
+            **kwargs,
         )
 
 
@@ -647,36 +1440,24 @@ class CorporationDetailsManager(models.Manager):
             )
         )
 
+    @stage("update_corporation_details")
     def update_or_create_from_esi(self, id: int) -> Tuple[models.Model, bool]:
         """Updates or create an obj from ESI"""
         logger.info("%s: Fetching corporation from ESI", id)
         data = esi.client.Corporation.get_corporations_corporation_id(
             corporation_id=id
         ).results()
-        corporation = EveEntity.objects.get_or_create(id=id)[0]
-        alliance = (
-            EveEntity.objects.get_or_create(id=data["alliance_id"])[0]
-            if data.get("alliance_id")
-            else None
-        )
-        ceo = EveEntity.objects.get_or_create(id=data["ceo_id"])[0]
-        faction = (
-            EveEntity.objects.get_or_create(id=data["faction_id"])[0]
-            if data.get("faction_id")
-            else None
-        )
-        EveEntity.objects.bulk_create_esi(
-            filter(
-                lambda x: x is not None,
-                [id, data.get("alliance_id"), data["ceo_id"], data.get("faction_id")],
-            )
+        new_entity_ids = _materialize_eve_entities(
+            [id, data.get("alliance_id"), data["ceo_id"], data.get("faction_id")]
         )
+        if new_entity_ids:
+            _resolve_eve_entities(new_entity_ids)
         return self.update_or_create(
-            corporation=corporation,
+            corporation_id=id,
             defaults={
-                "alliance": alliance,
-                "ceo": ceo,
-                "faction": faction,
+                "alliance_id": data.get("alliance_id") or None,
+                "ceo_id": data["ceo_id"],
+                "faction_id": data.get("faction_id") or None,
                 "member_count": data["member_count"],
                 "ticker": data["ticker"],
             },
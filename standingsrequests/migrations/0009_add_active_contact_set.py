@@ -0,0 +1,45 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def activate_latest_contact_set(apps, schema_editor):
+    ContactSet = apps.get_model("standingsrequests", "ContactSet")
+    ActiveContactSet = apps.get_model("standingsrequests", "ActiveContactSet")
+    contact_set = ContactSet.objects.order_by("-date").first()
+    if contact_set:
+        ActiveContactSet.objects.update_or_create(
+            pk=1, defaults={"contact_set": contact_set}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("standingsrequests", "0008_add_revocation_reason"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ActiveContactSet",
+            fields=[
+                (
+                    "id",
+                    models.PositiveSmallIntegerField(
+                        default=1, primary_key=True, serialize=False
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "contact_set",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="standingsrequests.contactset",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(activate_latest_contact_set, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("standingsrequests", "0009_add_active_contact_set"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="contactset",
+            name="content_hash",
+            field=models.CharField(
+                default="",
+                help_text="hash of all labels and contacts of this set as received from ESI",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="contactset",
+            name="verified_at",
+            field=models.DateTimeField(
+                default=None,
+                help_text="datetime when the contacts of this set were last confirmed by ESI",
+                null=True,
+            ),
+        ),
+    ]
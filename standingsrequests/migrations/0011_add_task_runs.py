@@ -0,0 +1,112 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("standingsrequests", "0010_add_contact_set_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskRun",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=254)),
+                ("duration", models.FloatField(help_text="Wall time in seconds")),
+                (
+                    "db_queries",
+                    models.PositiveIntegerField(help_text="Number of DB queries"),
+                ),
+                (
+                    "db_time",
+                    models.FloatField(help_text="Time spent in DB queries in seconds"),
+                ),
+                (
+                    "esi_calls",
+                    models.PositiveIntegerField(help_text="Number of ESI calls"),
+                ),
+                (
+                    "esi_time",
+                    models.FloatField(help_text="Time spent in ESI calls in seconds"),
+                ),
+                (
+                    "rows_written",
+                    models.PositiveIntegerField(
+                        help_text="Number of rows inserted, updated or deleted"
+                    ),
+                ),
+                ("started_at", models.DateTimeField(db_index=True)),
+                ("is_success", models.BooleanField(db_index=True)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="TaskRunStage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=254)),
+                ("duration", models.FloatField(help_text="Wall time in seconds")),
+                (
+                    "db_queries",
+                    models.PositiveIntegerField(help_text="Number of DB queries"),
+                ),
+                (
+                    "db_time",
+                    models.FloatField(help_text="Time spent in DB queries in seconds"),
+                ),
+                (
+                    "esi_calls",
+                    models.PositiveIntegerField(help_text="Number of ESI calls"),
+                ),
+                (
+                    "esi_time",
+                    models.FloatField(help_text="Time spent in ESI calls in seconds"),
+                ),
+                (
+                    "rows_written",
+                    models.PositiveIntegerField(
+                        help_text="Number of rows inserted, updated or deleted"
+                    ),
+                ),
+                (
+                    "position",
+                    models.PositiveIntegerField(
+                        help_text="Order in which stages started"
+                    ),
+                ),
+                (
+                    "task_run",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stages",
+                        to="standingsrequests.taskrun",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["task_run", "position"],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.14 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("standingsrequests", "0011_add_task_runs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="characteraffiliation",
+            name="last_checked",
+            field=models.DateTimeField(
+                db_index=True,
+                default=None,
+                help_text="When this affiliation was last fetched from ESI",
+                null=True,
+            ),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from datetime import timedelta
+from typing import Iterable, Optional, Tuple
 
 from django.contrib.auth.models import User
-from django.core import exceptions
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, OuterRef
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
@@ -19,6 +20,8 @@ from .app_settings import SR_REQUIRED_SCOPES, SR_STANDING_TIMEOUT_HOURS
 from .constants import OperationMode
 from .core import BaseConfig, ContactType, MainOrganizations
 from .helpers.evecorporation import EveCorporation
+from .helpers.instrumentation import stage
+from .helpers.snapshot import get_snapshot
 from .managers import (
     AbstractStandingsRequestManager,
     CharacterAffiliationManager,
@@ -39,6 +42,16 @@ class ContactSet(models.Model):
 
     date = models.DateTimeField(auto_now_add=True, db_index=True)
     name = models.CharField(max_length=254)
+    content_hash = models.CharField(
+        max_length=64,
+        default="",
+        help_text="hash of all labels and contacts of this set as received from ESI",
+    )
+    verified_at = models.DateTimeField(
+        null=True,
+        default=None,
+        help_text="datetime when the contacts of this set were last confirmed by ESI",
+    )
 
     objects = ContactSetManager()
 
@@ -57,47 +70,113 @@ class ContactSet(models.Model):
 
     def contact_has_satisfied_standing(self, contact_id: int) -> bool:
         """Return True if give contact has standing exists"""
-        try:
-            contact = self.contacts.get(eve_entity_id=contact_id)
-        except Contact.DoesNotExist:
+        standing = self.contact_standing(contact_id)
+        if standing is None:
             return False
-        return contact.is_standing_satisfied
+        return StandingRequest.is_standing_satisfied(standing)
+
+    def contact_standing(self, contact_id: int) -> Optional[float]:
+        """Return standing of given contact or None if it is not a contact
+
+        Uses the standings snapshot when available, else the database.
+        """
+        snapshot = get_snapshot(self)
+        if snapshot is not None:
+            return snapshot.standing(contact_id)
+        return (
+            self.contacts.filter(eve_entity_id=contact_id)
+            .values_list("standing", flat=True)
+            .first()
+        )
+
+    def contact_standings(self, contact_ids: Iterable[int]) -> dict:
+        """Return standings of all given contacts, which exist in this set
+
+        Uses the standings snapshot when available, else the database.
+        """
+        snapshot = get_snapshot(self)
+        if snapshot is not None:
+            return snapshot.standings(contact_ids)
+        return dict(
+            self.contacts.filter(eve_entity_id__in=list(contact_ids)).values_list(
+                "eve_entity_id", "standing"
+            )
+        )
+
+    def changed_contact_ids(self, other: "ContactSet") -> set:
+        """returns IDs of all entities, which standing was added, removed or changed
+        compared to the other contact set
+        """
+        if other.pk == self.pk:
+            return set()
+        contacts = set(self.contacts.values_list("eve_entity_id", "standing"))
+        other_contacts = set(other.contacts.values_list("eve_entity_id", "standing"))
+        return {entity_id for entity_id, dummy in contacts ^ other_contacts}
+
+    @property
+    def last_verified(self):
+        """datetime when the contacts of this set were last known to be current"""
+        return self.verified_at if self.verified_at else self.date
+
+    def activate(self) -> None:
+        """Make this contact set the currently active one."""
+        ActiveContactSet.objects.update_or_create(
+            pk=ActiveContactSet.SINGLETON_PK, defaults={"contact_set": self}
+        )
+        ContactSet.objects.refresh_current_handle()
 
+    @stage("generate_standing_requests_for_blue_alts")
     def generate_standing_requests_for_blue_alts(self) -> int:
         """Automatically creates effective standings requests for
         alt characters on Auth that already have blue standing in-game.
 
+        Blue alts are found with one query, which joins owned characters
+        with the satisfied contacts of this set.
+        Alts with a request from their current owner are skipped.
+
         return count of generated standings requests
         """
         logger.info("Started generating standings request for blue alts.")
-        owned_characters_qs = EveCharacter.objects.filter(
-            character_ownership__isnull=False
+        satisfied_contact_ids = self.contacts.filter(
+            standing__gte=StandingRequest.EXPECT_STANDING_GTEQ,
+            standing__lte=StandingRequest.EXPECT_STANDING_LTEQ,
+        ).values("eve_entity_id")
+        blue_alts = (
+            EveCharacter.objects.filter(
+                character_ownership__isnull=False,
+                character_id__in=satisfied_contact_ids,
+            )
+            .exclude(corporation_id__in=MainOrganizations.corporation_ids)
+            .exclude(alliance_id__in=MainOrganizations.alliance_ids)
+            .exclude(
+                Exists(
+                    StandingRequest.objects.filter(
+                        user=OuterRef("character_ownership__user"),
+                        contact_id=OuterRef("character_id"),
+                    )
+                )
+            )
+            .exclude(character_id__in=StandingRevocation.objects.values("contact_id"))
+            .values_list("character_id", "character_ownership__user_id")
         )
+        effective_date = now()
         created_counter = 0
-        for alt in owned_characters_qs:
-            user = alt.character_ownership.user
-            if (
-                not MainOrganizations.is_character_a_member(alt)
-                and not StandingRequest.objects.filter(
-                    user=user, contact_id=alt.character_id
-                ).exists()
-                and not StandingRevocation.objects.filter(
-                    contact_id=alt.character_id
-                ).exists()
-                and self.contact_has_satisfied_standing(alt.character_id)
-            ):
-                sr = StandingRequest.objects.get_or_create_2(
-                    user=user,
-                    contact_id=alt.character_id,
-                    contact_type=StandingRequest.CHARACTER_CONTACT_TYPE,
+        # requests are multi-table models and can not be created in bulk
+        with transaction.atomic():
+            for character_id, user_id in blue_alts:
+                StandingRequest.objects.create(
+                    user_id=user_id,
+                    contact_id=character_id,
+                    contact_type_id=ContactType.character_id,
+                    action_date=effective_date,
+                    is_effective=True,
+                    effective_date=effective_date,
                 )
-                sr.mark_actioned(None)
-                sr.mark_effective()
                 logger.info(
-                    "Generated standings request for blue alt %s "
-                    "belonging to user %s.",
-                    alt,
-                    user,
+                    "Generated standings request for blue alt %d "
+                    "belonging to user with pk %d.",
+                    character_id,
+                    user_id,
                 )
                 created_counter += 1
 
@@ -118,6 +197,25 @@ class ContactSet(models.Model):
             raise NotImplementedError()
 
 
+class ActiveContactSet(models.Model):
+    """Pointer to the contact set which is currently active
+
+    There is at most one instance of this model. A new contact set is filled
+    completely before the pointer is switched to it.
+    """
+
+    SINGLETON_PK = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_PK)
+    contact_set = models.OneToOneField(
+        ContactSet, on_delete=models.CASCADE, related_name="+"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.contact_set_id)
+
+
 class ContactLabel(models.Model):
     """A contact label"""
 
@@ -291,18 +389,21 @@ class AbstractStandingsRequest(models.Model):
         Check and mark a standing as satisfied
         :param check_only: Check the standing only, take no action
         """
+        logger.debug("Checking standing for %d", self.contact_id)
         try:
-            logger.debug("Checking standing for %d", self.contact_id)
-            latest = ContactSet.objects.latest()
-            contact = latest.contacts.get(eve_entity_id=self.contact_id)
-            if self.is_standing_satisfied(contact.standing):
+            contact_set = ContactSet.objects.current()
+        except ContactSet.DoesNotExist:
+            standing = None
+        else:
+            standing = contact_set.contact_standing(self.contact_id)
+        if standing is not None:
+            if self.is_standing_satisfied(standing):
                 # Standing is satisfied
                 logger.debug("Standing satisfied for %d", self.contact_id)
                 if not check_only:
                     self.mark_effective()
                 return True
-
-        except exceptions.ObjectDoesNotExist:
+        else:
             logger.debug(
                 "No standing set for %d, checking if neutral is OK", self.contact_id
             )
@@ -329,7 +430,7 @@ class AbstractStandingsRequest(models.Model):
         logger.debug("Marking standing for %d as effective", self.contact_id)
         self.is_effective = True
         self.effective_date = date if date else now()
-        self.save()
+        self.save(update_fields=["is_effective", "effective_date"])
 
     def mark_actioned(self, user, date=None):
         """
@@ -342,7 +443,7 @@ class AbstractStandingsRequest(models.Model):
         logger.debug("Marking standing for %d as actioned", self.contact_id)
         self.action_by = user
         self.action_date = date if date else now()
-        self.save()
+        self.save(update_fields=["action_by", "action_date"])
 
     def check_actioned_timeout(self):
         """
@@ -361,13 +462,14 @@ class AbstractStandingsRequest(models.Model):
             return None
 
         try:
-            latest = ContactSet.objects.latest()
+            contact_set = ContactSet.objects.current()
         except ContactSet.DoesNotExist:
             logger.debug("Cannot check standing timeout, no standings available")
             return None
 
         # Reset request that has not become effective after timeout expired
-        if self.action_date + timedelta(hours=SR_STANDING_TIMEOUT_HOURS) < latest.date:
+        deadline = self.action_date + timedelta(hours=SR_STANDING_TIMEOUT_HOURS)
+        if deadline < contact_set.last_verified:
             logger.info(
                 "Standing actioned timed out, resetting actioned for contact_id %d",
                 self.contact_id,
@@ -375,7 +477,7 @@ class AbstractStandingsRequest(models.Model):
             actioner = self.action_by
             self.action_by = None
             self.action_date = None
-            self.save()
+            self.save(update_fields=["action_by", "action_date"])
             return actioner
         return False
 
@@ -389,7 +491,9 @@ class AbstractStandingsRequest(models.Model):
         self.effective_date = None
         self.action_by = None
         self.action_date = None
-        self.save()
+        self.save(
+            update_fields=["is_effective", "effective_date", "action_by", "action_date"]
+        )
 
 
 class StandingRequest(AbstractStandingsRequest):
@@ -447,7 +551,7 @@ class StandingRequest(AbstractStandingsRequest):
         for user if possible.
         """
         try:
-            contact_set = ContactSet.objects.latest()
+            contact_set = ContactSet.objects.current()
         except ContactSet.DoesNotExist:
             logger.warning("Failed to get a contact set")
             return False
@@ -531,6 +635,83 @@ class StandingRequest(AbstractStandingsRequest):
             and corporation.user_has_all_member_tokens(user)
         )
 
+    @classmethod
+    def corporation_requests_with_all_member_tokens(
+        cls, user_corporation_ids: Iterable[Tuple[int, int]]
+    ) -> set:
+        """Checks for many pairs of user ID and corporation ID at once
+        if the user owns all of the required corp tokens.
+
+        Tokens are counted with one aggregated query per state of the involved users
+        and member counts are taken from CorporationDetails.
+
+        returns the pairs for which standings are permitted
+        """
+        user_corporation_ids = {
+            (user_id, corporation_id)
+            for user_id, corporation_id in user_corporation_ids
+            if not EveCorporation.corporation_is_npc(corporation_id)
+        }
+        if not user_corporation_ids:
+            return set()
+
+        user_ids = {user_id for user_id, dummy in user_corporation_ids}
+        corporation_ids = {
+            corporation_id for dummy, corporation_id in user_corporation_ids
+        }
+        member_counts = dict(
+            CorporationDetails.objects.filter(
+                corporation_id__in=corporation_ids
+            ).values_list("corporation_id", "member_count")
+        )
+        # fall back to ESI for corporations not yet synced
+        for corporation in EveCorporation.get_many_by_id(
+            corporation_ids - set(member_counts.keys())
+        ):
+            if corporation and corporation.member_count is not None:
+                member_counts[corporation.corporation_id] = corporation.member_count
+
+        characters_qs = EveCharacter.objects.filter(
+            character_ownership__user_id__in=user_ids,
+            corporation_id__in=corporation_ids,
+        )
+        state_names = set(
+            characters_qs.values_list(
+                "character_ownership__user__profile__state__name", flat=True
+            )
+        )
+        tokens_counts = dict()
+        for state_name in state_names:
+            scopes_string = " ".join(cls.get_required_scopes_for_state(state_name))
+            valid_tokens_qs = (
+                Token.objects.filter(
+                    character_id__in=characters_qs.values("character_id")
+                )
+                .require_scopes(scopes_string)
+                .require_valid()
+            )
+            for user_id, corporation_id, tokens_count in (
+                characters_qs.filter(
+                    character_ownership__user__profile__state__name=state_name,
+                    character_id__in=valid_tokens_qs.values("character_id"),
+                )
+                .values("character_ownership__user_id", "corporation_id")
+                .annotate(tokens_count=Count("pk", distinct=True))
+                .values_list(
+                    "character_ownership__user_id", "corporation_id", "tokens_count"
+                )
+            ):
+                key = (user_id, corporation_id)
+                tokens_counts[key] = tokens_counts.get(key, 0) + tokens_count
+
+        return {
+            (user_id, corporation_id)
+            for user_id, corporation_id in user_corporation_ids
+            if corporation_id in member_counts
+            and tokens_counts.get((user_id, corporation_id), 0)
+            >= member_counts[corporation_id]
+        }
+
     @classmethod
     def has_required_scopes_for_request(
         cls, character: EveCharacter, user: User = None, quick_check: bool = False
@@ -629,6 +810,12 @@ class CharacterAffiliation(models.Model):
         help_text="Related auth character (if any)",
     )
     updated = models.DateTimeField(auto_now_add=True)
+    last_checked = models.DateTimeField(
+        null=True,
+        default=None,
+        db_index=True,
+        help_text="When this affiliation was last fetched from ESI",
+    )
 
     objects = CharacterAffiliationManager()
 
@@ -677,3 +864,45 @@ class CorporationDetails(models.Model):
 
     def __str__(self) -> str:
         return self.corporation.name
+
+
+class AbstractTaskStats(models.Model):
+    """Base class for stats recorded by the task instrumentation"""
+
+    name = models.CharField(max_length=254, db_index=True)
+    duration = models.FloatField(help_text="Wall time in seconds")
+    db_queries = models.PositiveIntegerField(help_text="Number of DB queries")
+    db_time = models.FloatField(help_text="Time spent in DB queries in seconds")
+    esi_calls = models.PositiveIntegerField(help_text="Number of ESI calls")
+    esi_time = models.FloatField(help_text="Time spent in ESI calls in seconds")
+    rows_written = models.PositiveIntegerField(
+        help_text="Number of rows inserted, updated or deleted"
+    )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TaskRun(AbstractTaskStats):
+    """Stats of a task run, recorded when task instrumentation is enabled"""
+
+    started_at = models.DateTimeField(db_index=True)
+    is_success = models.BooleanField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.started_at}"
+
+
+class TaskRunStage(AbstractTaskStats):
+    """Stats of a stage of a task run"""
+
+    task_run = models.ForeignKey(
+        TaskRun, on_delete=models.CASCADE, related_name="stages"
+    )
+    position = models.PositiveIntegerField(help_text="Order in which stages started")
+
+    class Meta:
+        ordering = ["task_run", "position"]
@@ -5,6 +5,22 @@ from esi.clients import EsiClientProvider
 from app_utils.logging import LoggerAddTag
 
 from . import __title__, __version__
+from .helpers.instrumentation import record_esi_response
 
 logger = LoggerAddTag(logging.getLogger(__name__), __title__)
-esi = EsiClientProvider(app_info_text=f"aa-standingsrequests v{__version__}")
+
+
+class _EsiClientProvider(EsiClientProvider):
+    """ESI client provider, which reports all responses to the task instrumentation"""
+
+    @property
+    def client(self):
+        if self._client is None:
+            client = super().client
+            client.swagger_spec.http_client.session.hooks["response"].append(
+                record_esi_response
+            )
+        return super().client
+
+
+esi = _EsiClientProvider(app_info_text=f"aa-standingsrequests v{__version__}")
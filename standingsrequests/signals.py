@@ -0,0 +1,110 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from esi.models import Token
+
+from allianceauth.authentication.models import CharacterOwnership
+from allianceauth.authentication.signals import state_changed
+from allianceauth.eveonline.models import EveCharacter
+
+from .app_settings import SR_INCREMENTAL_VALIDATION_ENABLED
+from .models import ActiveContactSet, ContactSet, StandingRequest
+from .tasks import validate_requests_for_users
+
+_local = threading.local()
+
+
+@receiver(post_delete, sender=ActiveContactSet)
+def active_contact_set_deleted(sender, instance, **kwargs):
+    ContactSet.objects.refresh_current_handle()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    _validate_requests_of_users([instance.user_id])
+
+
+@receiver(post_save, sender=CharacterOwnership)
+@receiver(post_delete, sender=CharacterOwnership)
+def character_ownership_changed(sender, instance, **kwargs):
+    # the previous owner might have a request for the corporation of that character
+    corporation_ids = EveCharacter.objects.filter(pk=instance.character_id).values(
+        "corporation_id"
+    )
+    user_ids = set(
+        StandingRequest.objects.filter(contact_id__in=corporation_ids).values_list(
+            "user_id", flat=True
+        )
+    )
+    user_ids.add(instance.user_id)
+    _validate_requests_of_users(user_ids)
+
+
+@receiver(state_changed)
+def user_state_changed(sender, user, state, **kwargs):
+    _validate_requests_of_users([user.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # members of a group are no longer known after it has been cleared
+        instance._sr_cleared_user_ids = list(
+            instance.user_set.values_list("pk", flat=True)
+        )
+        return
+    if action not in {"post_add", "post_remove", "post_clear"}:
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "post_clear":
+        user_ids = instance.__dict__.pop("_sr_cleared_user_ids", [])
+    else:
+        user_ids = pk_set
+    _validate_requests_of_users(user_ids)
+
+
+def _validate_requests_of_users(user_ids) -> None:
+    """Queues validation of the requests of the given users
+    once the current transaction is committed.
+
+    All users from the same transaction are validated by one task.
+    """
+    if not SR_INCREMENTAL_VALIDATION_ENABLED:
+        return
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not user_ids:
+        return
+    user_ids_with_requests = set(
+        StandingRequest.objects.filter(user_id__in=user_ids)
+        .values_list("user_id", flat=True)
+        .distinct()
+    )
+    if not user_ids_with_requests:
+        return
+    pending = getattr(_local, "pending_validation", None)
+    if pending is not None and pending.is_queued():
+        pending.user_ids |= user_ids_with_requests
+    else:
+        pending = _PendingValidation(user_ids_with_requests)
+        _local.pending_validation = pending
+        transaction.on_commit(pending)
+
+
+class _PendingValidation:
+    """Validation of requests for users, which runs once on commit."""
+
+    def __init__(self, user_ids: set) -> None:
+        self.user_ids = set(user_ids)
+
+    def __call__(self) -> None:
+        if getattr(_local, "pending_validation", None) is self:
+            _local.pending_validation = None
+        validate_requests_for_users.delay(sorted(self.user_ids))
+
+    def is_queued(self) -> bool:
+        """returns True if this validation still waits for the current commit"""
+        return any(entry[1] is self for entry in connection.run_on_commit)
@@ -1,8 +1,11 @@
 from datetime import timedelta
+from uuid import uuid4
 
 from celery import chain, shared_task
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.dateparse import parse_datetime
 from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
@@ -11,22 +14,34 @@ from allianceauth.services.hooks import get_extension_logger
 from app_utils.logging import LoggerAddTag
 
 from . import __title__
-from .app_settings import SR_STANDINGS_STALE_HOURS, SR_SYNC_BLUE_ALTS_ENABLED
+from .app_settings import (
+    SR_PROCESS_REQUESTS_SHARDS,
+    SR_STANDINGS_PURGE_TIME_BUDGET,
+    SR_STANDINGS_STALE_HOURS,
+    SR_SYNC_BLUE_ALTS_ENABLED,
+    SR_TASK_RUNS_STALE_DAYS,
+)
 from .core import BaseConfig
+from .helpers.instrumentation import instrument_task, stage
+from .helpers.notifications import NotificationOutbox
 from .models import (
+    AbstractStandingsRequest,
     CharacterAffiliation,
-    Contact,
-    ContactLabel,
     ContactSet,
     CorporationDetails,
     StandingRequest,
     StandingRevocation,
+    TaskRun,
 )
 
 logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 
+# max seconds the completion of a sharded run is tracked
+SHARDED_RUN_CACHE_TIMEOUT = 3600 * 24
+
 
 @shared_task(name="standings_requests.update_all")
+@instrument_task
 def update_all(user_pk: int = None):
     """Updates standings and affiliations"""
     my_chain = chain(
@@ -40,6 +55,7 @@ def update_all(user_pk: int = None):
 
 
 @shared_task(name="standings_requests.report_result_to_user")
+@instrument_task
 def report_result_to_user(user_pk: int = None):
     if user_pk:
         try:
@@ -61,9 +77,14 @@ def report_result_to_user(user_pk: int = None):
 
 
 @shared_task(name="standings_requests.standings_update")
+@instrument_task
 def standings_update():
     """Updates standings from ESI"""
     logger.info("Standings API update started")
+    try:
+        previous_set = ContactSet.objects.current()
+    except ContactSet.DoesNotExist:
+        previous_set = None
     contact_set = ContactSet.objects.create_new_from_api()
     if not contact_set:
         logger.warn(
@@ -73,23 +94,178 @@ def standings_update():
     else:
         if SR_SYNC_BLUE_ALTS_ENABLED:
             contact_set.generate_standing_requests_for_blue_alts()
-        StandingRequest.objects.process_requests()
-        StandingRevocation.objects.process_requests()
+        # only requests for contacts with changed standing need to be processed
+        if previous_set:
+            contact_ids = contact_set.changed_contact_ids(previous_set)
+            requested_since = previous_set.last_verified
+            logger.info("Standing changed for %d contacts", len(contact_ids))
+        else:
+            contact_ids = None
+            requested_since = None
+        _process_requests(contact_ids, requested_since)
+
+
+@shared_task(name="standings_requests.process_all_requests")
+@instrument_task
+def process_all_requests():
+    """Processes all requests and revocations against the current standings.
+
+    This catches up on requests missed by the standings update,
+    which only processes requests for contacts with changed standing.
+    """
+    try:
+        ContactSet.objects.current()
+    except ContactSet.DoesNotExist:
+        logger.warning("No standings have been loaded yet, aborting")
+        return
+    _process_requests(None, None)
+
+
+def _process_requests(contact_ids: set, requested_since) -> None:
+    if SR_PROCESS_REQUESTS_SHARDS > 1:
+        _process_requests_sharded(contact_ids, requested_since)
+    else:
+        outbox = NotificationOutbox()
+        with stage("process_standing_requests"):
+            StandingRequest.objects.process_requests(
+                contact_ids, requested_since, outbox=outbox
+            )
+        with stage("process_standing_revocations"):
+            StandingRevocation.objects.process_requests(
+                contact_ids, requested_since, outbox=outbox
+            )
+        outbox.send()
+
+
+def _process_requests_sharded(contact_ids: set, requested_since) -> None:
+    """Processes requests in parallel with one task per range of contact IDs.
+
+    Requests and revocations for the same contact are always processed
+    by the same task and in the same order as in the serial path.
+    Shards are independent tasks, so no result backend is required.
+    Instead the shards count down a counter in the cache
+    and the last shard to complete reports the run.
+    """
+    ranges = AbstractStandingsRequest.objects.contact_id_ranges(
+        SR_PROCESS_REQUESTS_SHARDS
+    )
+    logger.info("Processing requests in %d shards", len(ranges))
+    requested_since = requested_since.isoformat() if requested_since else None
+    run_id = uuid4().hex
+    cache.set_many(
+        {
+            _sharded_run_key(run_id, "remaining"): len(ranges),
+            _sharded_run_key(run_id, "notifications"): 0,
+            _sharded_run_key(run_id, "started"): now(),
+        },
+        SHARDED_RUN_CACHE_TIMEOUT,
+    )
+    for start, end in ranges:
+        if contact_ids is None:
+            shard_contact_ids = None
+        else:
+            shard_contact_ids = [
+                contact_id
+                for contact_id in contact_ids
+                if (start is None or contact_id >= start)
+                and (end is None or contact_id < end)
+            ]
+        process_requests_shard.delay(
+            start, end, shard_contact_ids, requested_since, run_id
+        )
+
+
+@shared_task
+@instrument_task
+def process_requests_shard(
+    start: int,
+    end: int,
+    contact_ids: list = None,
+    requested_since: str = None,
+    run_id: str = None,
+):
+    """Processes requests and revocations for contacts in a range of IDs
+    and sends the resulting notifications.
+    """
+    outbox = NotificationOutbox()
+    contact_id_range = (start, end)
+    requested_since = parse_datetime(requested_since) if requested_since else None
+    StandingRequest.objects.process_requests(
+        contact_ids, requested_since, contact_id_range, outbox=outbox
+    )
+    StandingRevocation.objects.process_requests(
+        contact_ids, requested_since, contact_id_range, outbox=outbox
+    )
+    notifications_count = outbox.send()
+    if run_id:
+        _complete_shard(run_id, notifications_count)
+
+
+def _complete_shard(run_id: str, notifications_count: int) -> None:
+    """Counts down the shards of a run and reports the run after the last shard."""
+    try:
+        cache.incr(_sharded_run_key(run_id, "notifications"), notifications_count)
+        remaining = cache.decr(_sharded_run_key(run_id, "remaining"))
+    except ValueError:
+        logger.warning("Sharded run %s is no longer tracked", run_id)
+        return
+    if remaining > 0:
+        return
+    keys = [
+        _sharded_run_key(run_id, name)
+        for name in ["remaining", "notifications", "started"]
+    ]
+    data = cache.get_many(keys)
+    cache.delete_many(keys)
+    started = data.get(_sharded_run_key(run_id, "started"))
+    logger.info(
+        "Completed processing requests in all shards of run %s "
+        "within %s. Sent %d notifications",
+        run_id,
+        now() - started if started else "unknown time",
+        data.get(_sharded_run_key(run_id, "notifications"), 0),
+    )
+
+
+def _sharded_run_key(run_id: str, name: str) -> str:
+    return f"standingsrequests_sharded_run_{run_id}_{name}"
 
 
 @shared_task(name="standings_requests.validate_requests")
+@instrument_task
 def validate_requests():
     logger.info("Validating standings request running")
     count = StandingRequest.objects.validate_requests()
     logger.info("Dealt with %d invalid standings requests", count)
 
 
+@shared_task(name="standings_requests.validate_requests_for_users")
+@instrument_task
+def validate_requests_for_users(user_pks: list):
+    """Validates the requests of the given users only"""
+    count = StandingRequest.objects.validate_requests(user_pks)
+    logger.info(
+        "Dealt with %d invalid standings requests of %d users", count, len(user_pks)
+    )
+
+
+@shared_task(name="standings_requests.reset_timed_out_requests")
+@instrument_task
+def reset_timed_out_requests():
+    """Resets actioned requests, which did not become effective in time"""
+    count = StandingRequest.objects.reset_timed_out()
+    count += StandingRevocation.objects.reset_timed_out()
+    logger.info("Reset %d timed out standings requests", count)
+
+
 @shared_task(name="standings_requests.update_associations_auth")
+@instrument_task
 def update_associations_auth():
     ...
 
 
 @shared_task(name="standings_requests.update_associations_api")
+@instrument_task
 def update_associations_api():
     """Update character affiliations from ESI and relations to Eve Characters"""
     chain(
@@ -102,6 +278,7 @@ def update_associations_api():
 
 
 @shared_task
+@instrument_task
 def _update_character_affiliations_from_esi():
     logger.info("Running character affiliations updating from ESI...")
     CharacterAffiliation.objects.update_from_esi()
@@ -109,6 +286,7 @@ def _update_character_affiliations_from_esi():
 
 
 @shared_task
+@instrument_task
 def _update_character_affiliations_to_auth():
     logger.info("Updating character affiliations relations to Auth...")
     CharacterAffiliation.objects.update_evecharacter_relations()
@@ -116,46 +294,39 @@ def _update_character_affiliations_to_auth():
 
 
 @shared_task(name="standings_requests.purge_stale_data")
+@instrument_task
 def purge_stale_data():
     """Delete all the data which is beyond its useful life.
     There is no harm in disabling this if you wish to keep everything.
     """
-    my_chain = chain([purge_stale_standings_data.si()])
+    my_chain = chain([purge_stale_standings_data.si(), purge_stale_task_runs.si()])
     my_chain.delay()
 
 
 @shared_task
+@instrument_task
 def purge_stale_standings_data():
     """Deletes all stale (=older than threshold hours) contact sets
-    except the last remaining contact set
+    except the currently active contact set
     """
     logger.info("Purging stale standings data")
     cutoff_date = now() - timedelta(hours=SR_STANDINGS_STALE_HOURS)
-    try:
-        latest_standings = ContactSet.objects.latest()
-        stale_contacts_qs = ContactSet.objects.filter(date__lt=cutoff_date).exclude(
-            id=latest_standings.id
-        )
-        if stale_contacts_qs.exists():
-            logger.debug("Deleting old ContactSets")
-            # we can't just do standigs.delete()
-            # because with lots of them it uses lots of memory
-            # lets go over them one by one and delete
-            for contact_set in stale_contacts_qs:
-                Contact.objects.filter(contact_set=contact_set).delete()
-                Contact.objects.filter(contact_set=contact_set).delete()
-                Contact.objects.filter(contact_set=contact_set).delete()
-                ContactLabel.objects.filter(contact_set=contact_set).delete()
-
-            stale_contacts_qs.delete()
-        else:
-            logger.debug("No ContactSets to delete")
+    ContactSet.objects.purge_stale(
+        cutoff_date, time_budget=SR_STANDINGS_PURGE_TIME_BUDGET
+    )
 
-    except ContactSet.DoesNotExist:
-        logger.warn("No ContactSets available, nothing to delete")
+
+@shared_task
+@instrument_task
+def purge_stale_task_runs():
+    """Deletes stats of task runs older than threshold days"""
+    cutoff_date = now() - timedelta(days=SR_TASK_RUNS_STALE_DAYS)
+    deleted_count, _ = TaskRun.objects.filter(started_at__lt=cutoff_date).delete()
+    logger.info("Deleted %d stale task runs", deleted_count)
 
 
 @shared_task
+@instrument_task
 def update_all_corporation_details():
     existing_corporation_ids = (
         CorporationDetails.objects.corporation_ids_from_contacts()
@@ -175,5 +346,6 @@ def update_all_corporation_details():
 
 
 @shared_task
+@instrument_task
 def update_corporation_detail(corporation_id: int):
     CorporationDetails.objects.update_or_create_from_esi(corporation_id)
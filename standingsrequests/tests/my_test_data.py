@@ -150,8 +150,17 @@ def esi_get_alliances_alliance_id_contacts_labels(*args, **kwargs) -> object:
     return BravadoOperationStub(deepcopy(_my_test_data["alliance_labels"]))
 
 
-def esi_get_alliances_alliance_id_contacts(*args, **kwargs) -> object:
-    return BravadoOperationStub(deepcopy(_my_test_data["alliance_contacts"]))
+def esi_get_alliances_alliance_id_contacts(*args, page=None, **kwargs) -> object:
+    contacts = deepcopy(_my_test_data["alliance_contacts"])
+    if page is None:
+        return BravadoOperationStub(contacts)
+
+    page_size = 5
+    pages_count = (len(contacts) - 1) // page_size + 1
+    return BravadoOperationStub(
+        contacts[(page - 1) * page_size : page * page_size],
+        headers={"X-Pages": pages_count},
+    )
 
 
 ##########################
@@ -183,13 +192,11 @@ def get_test_labels() -> list:
 
 def get_test_contacts():
     """returns contacts from test data as list of _ContactsWrapper.Contact"""
-    labels = get_test_labels()
-
     contact_ids = [x["contact_id"] for x in get_my_test_data()["alliance_contacts"]]
     names_info = get_entity_names(contact_ids)
     contacts = list()
     for contact_data in get_my_test_data()["alliance_contacts"]:
-        contacts.append(_ContactsWrapper.Contact(contact_data, labels, names_info))
+        contacts.append(_ContactsWrapper.Contact(contact_data, names_info))
 
     return contacts
 
@@ -259,6 +266,7 @@ def create_contacts_set(my_set: ContactSet = None, include_assoc=True) -> Contac
         for assoc in _my_test_data["CharacterAffiliation"]:
             CharacterAffiliation.objects.create(**assoc)
 
+    my_set.activate()
     return my_set
 
 
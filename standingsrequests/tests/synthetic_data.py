@@ -0,0 +1,280 @@
+"""Synthetic standings data in any size for benchmarks
+
+Generates contacts, labels, auth characters with ownerships and requests
+and provides ESI stubs that return the generated data.
+"""
+
+import random
+
+from django.contrib.auth.models import User
+from eveuniverse.models import EveEntity
+
+from allianceauth.authentication.models import CharacterOwnership
+from allianceauth.eveonline.models import EveCharacter
+from app_utils.esi_testing import BravadoOperationStub
+
+from ..core import ContactType
+from ..models import StandingRequest, StandingRevocation
+
+# ID ranges for generated entities
+CHARACTER_ID_START = 90_000_001
+AUTH_CHARACTER_ID_START = 95_000_001
+CORPORATION_ID_START = 98_000_001
+ALLIANCE_ID_START = 99_000_001
+
+# alliance the standings are fetched from, must not overlap with contacts
+OWNER_ALLIANCE_ID = 99_999_999
+OWNER_CORPORATION_ID = 98_999_999
+
+# same page size as the ESI contacts endpoints
+ESI_CONTACTS_PAGE_SIZE = 1000
+
+BATCH_SIZE = 500
+
+
+class SyntheticStandingsData:
+    """Generator for synthetic standings data
+
+    Args:
+        contacts_count: total number of contacts the standings source has
+        auth_characters_ratio: number of auth characters relative to contacts
+        labels_count: number of contact labels
+        seed: seed for the random generator, so runs are comparable
+    """
+
+    def __init__(
+        self,
+        contacts_count: int,
+        auth_characters_ratio: float = 0.1,
+        labels_count: int = 20,
+        seed: int = 42,
+    ) -> None:
+        self.contacts_count = contacts_count
+        self._random = random.Random(seed)
+        self.auth_character_ids = [
+            AUTH_CHARACTER_ID_START + num
+            for num in range(max(int(contacts_count * auth_characters_ratio), 1))
+        ]
+        self.corporations_count = max(contacts_count // 5, 1)
+        self.alliances_count = max(contacts_count // 50, 1)
+        self.labels = [
+            {"label_id": num, "label_name": f"Label {num}"}
+            for num in range(1, labels_count + 1)
+        ]
+        self.contacts = self._generate_contacts()
+
+    def _generate_contacts(self) -> list:
+        """Generate contacts in ESI format.
+
+        Half of the auth characters are blue contacts,
+        the remainder are characters, corporations and alliances not on auth.
+        """
+        label_ids = [label["label_id"] for label in self.labels]
+        auth_character_ids = set(self.auth_character_ids)
+        contact_types = {
+            **{
+                character_id: "character"
+                for character_id in self.auth_character_ids[
+                    : len(self.auth_character_ids) // 2
+                ]
+            },
+            **{
+                CORPORATION_ID_START + num: "corporation"
+                for num in range(self.corporations_count)
+            },
+            **{
+                ALLIANCE_ID_START + num: "alliance"
+                for num in range(self.alliances_count)
+            },
+        }
+        num = 0
+        while len(contact_types) < self.contacts_count:
+            contact_types[CHARACTER_ID_START + num] = "character"
+            num += 1
+
+        contacts = []
+        for contact_id, contact_type in list(contact_types.items())[
+            : self.contacts_count
+        ]:
+            if contact_id in auth_character_ids:
+                standing = self._random.choice([5.0, 10.0])
+            else:
+                standing = self._random.choice([-10.0, -5.0, 0.0, 5.0, 10.0])
+            contacts.append(
+                {
+                    "contact_id": contact_id,
+                    "contact_type": contact_type,
+                    "standing": standing,
+                    "label_ids": self._random.sample(
+                        label_ids, self._random.randint(0, min(3, len(label_ids)))
+                    ),
+                }
+            )
+        return contacts
+
+    @property
+    def character_ids(self) -> list:
+        """IDs of all characters incl. auth characters not in contacts"""
+        contact_character_ids = [
+            contact["contact_id"]
+            for contact in self.contacts
+            if contact["contact_type"] == "character"
+        ]
+        return sorted(set(contact_character_ids) | set(self.auth_character_ids))
+
+    def corporation_id_for_character(self, character_id: int) -> int:
+        return CORPORATION_ID_START + character_id % self.corporations_count
+
+    def alliance_id_for_corporation(self, corporation_id: int) -> int:
+        num = corporation_id - CORPORATION_ID_START
+        return ALLIANCE_ID_START + num % self.alliances_count if num % 2 else None
+
+    def create_eve_entities(self) -> None:
+        """Create EveEntity objects for all generated entities and the owner."""
+        entities = [
+            EveEntity(
+                id=character_id,
+                name=f"Character {character_id}",
+                category=EveEntity.CATEGORY_CHARACTER,
+            )
+            for character_id in self.character_ids
+        ]
+        entities += [
+            EveEntity(
+                id=CORPORATION_ID_START + num,
+                name=f"Corporation {CORPORATION_ID_START + num}",
+                category=EveEntity.CATEGORY_CORPORATION,
+            )
+            for num in range(self.corporations_count)
+        ]
+        entities += [
+            EveEntity(
+                id=ALLIANCE_ID_START + num,
+                name=f"Alliance {ALLIANCE_ID_START + num}",
+                category=EveEntity.CATEGORY_ALLIANCE,
+            )
+            for num in range(self.alliances_count)
+        ]
+        entities += [
+            EveEntity(
+                id=OWNER_CORPORATION_ID,
+                name="Owner Corporation",
+                category=EveEntity.CATEGORY_CORPORATION,
+            ),
+            EveEntity(
+                id=OWNER_ALLIANCE_ID,
+                name="Owner Alliance",
+                category=EveEntity.CATEGORY_ALLIANCE,
+            ),
+        ]
+        EveEntity.objects.bulk_create(
+            entities, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+
+    def create_auth_characters(self) -> None:
+        """Create one user for every 3 auth characters and their ownerships."""
+        characters = []
+        for character_id in self.auth_character_ids:
+            corporation_id = self.corporation_id_for_character(character_id)
+            alliance_id = self.alliance_id_for_corporation(corporation_id)
+            characters.append(
+                EveCharacter(
+                    character_id=character_id,
+                    character_name=f"Character {character_id}",
+                    corporation_id=corporation_id,
+                    corporation_name=f"Corporation {corporation_id}",
+                    corporation_ticker="CORP",
+                    alliance_id=alliance_id,
+                    alliance_name=f"Alliance {alliance_id}" if alliance_id else "",
+                    alliance_ticker="ALLY" if alliance_id else "",
+                )
+            )
+        EveCharacter.objects.bulk_create(characters, batch_size=BATCH_SIZE)
+        users_count = (len(self.auth_character_ids) - 1) // 3 + 1
+        User.objects.bulk_create(
+            [User(username=f"synthetic_user_{num}") for num in range(users_count)],
+            batch_size=BATCH_SIZE,
+        )
+        user_pks = list(
+            User.objects.filter(username__startswith="synthetic_user_")
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        character_pks = EveCharacter.objects.filter(
+            character_id__in=self.auth_character_ids
+        ).values_list("pk", "character_id")
+        CharacterOwnership.objects.bulk_create(
+            [
+                CharacterOwnership(
+                    character_id=character_pk,
+                    user_id=user_pks[(character_id - AUTH_CHARACTER_ID_START) // 3],
+                    owner_hash=f"synthetic_{character_id}",
+                )
+                for character_pk, character_id in character_pks
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+    def create_requests(self) -> None:
+        """Create standing requests and revocations for auth characters.
+
+        Every second auth character has a request.
+        Every tenth blue auth character has a revocation.
+        """
+        user_map = {
+            character_id: user_pk
+            for character_id, user_pk in CharacterOwnership.objects.filter(
+                character__character_id__in=self.auth_character_ids
+            ).values_list("character__character_id", "user_id")
+        }
+        # requests are multi-table models and can not be created in bulk
+        for character_id in self.auth_character_ids[::2]:
+            StandingRequest.objects.create(
+                user_id=user_map[character_id],
+                contact_id=character_id,
+                contact_type_id=ContactType.character_id,
+            )
+        blue_character_ids = self.auth_character_ids[
+            : len(self.auth_character_ids) // 2
+        ]
+        for character_id in blue_character_ids[::10]:
+            StandingRevocation.objects.create(
+                user_id=user_map[character_id],
+                contact_id=character_id,
+                contact_type_id=ContactType.character_id,
+            )
+
+    def create_all(self) -> None:
+        """Create all generated objects in the database."""
+        self.create_eve_entities()
+        self.create_auth_characters()
+        self.create_requests()
+
+    ##########################
+    # esi emulation
+
+    def esi_get_alliances_alliance_id_contacts_labels(self, *args, **kwargs):
+        return BravadoOperationStub(list(self.labels))
+
+    def esi_get_alliances_alliance_id_contacts(self, *args, page=1, **kwargs):
+        pages_count = (len(self.contacts) - 1) // ESI_CONTACTS_PAGE_SIZE + 1
+        return BravadoOperationStub(
+            self.contacts[
+                (page - 1) * ESI_CONTACTS_PAGE_SIZE : page * ESI_CONTACTS_PAGE_SIZE
+            ],
+            headers={"X-Pages": pages_count},
+        )
+
+    def esi_post_characters_affiliation(self, characters, *args, **kwargs):
+        affiliations = []
+        for character_id in characters:
+            corporation_id = self.corporation_id_for_character(character_id)
+            affiliation = {
+                "character_id": character_id,
+                "corporation_id": corporation_id,
+            }
+            alliance_id = self.alliance_id_for_corporation(corporation_id)
+            if alliance_id:
+                affiliation["alliance_id"] = alliance_id
+            affiliations.append(affiliation)
+        return BravadoOperationStub(affiliations)
@@ -0,0 +1,173 @@
+"""Benchmarks for the standings sync with synthetic data
+
+These benchmarks are skipped by default. To run them:
+
+    SR_BENCHMARK=1 python runtests.py standingsrequests.tests.test_benchmarks
+
+Optional environment variables:
+
+- SR_BENCHMARK_SIZES: comma separated list of contact counts,
+  default: "10000,50000,100000"
+- SR_BENCHMARK_OUTPUT: path of the JSON file results are written to,
+  default: "benchmark_results.json"
+"""
+
+import json
+import os
+import platform
+import tracemalloc
+from time import perf_counter
+from unittest import skipUnless
+from unittest.mock import patch
+
+import django
+from django.db import connection, transaction
+from django.test import TestCase
+from django.utils.timezone import now
+
+from allianceauth.eveonline.models import EveCharacter
+from allianceauth.tests.auth_utils import AuthUtils
+from app_utils.testing import add_character_to_user
+
+from .. import __version__, tasks
+from ..models import (
+    CharacterAffiliation,
+    ContactSet,
+    StandingRequest,
+    StandingRevocation,
+)
+from .synthetic_data import (
+    OWNER_ALLIANCE_ID,
+    OWNER_CORPORATION_ID,
+    SyntheticStandingsData,
+)
+
+CORE_PATH = "standingsrequests.core"
+MANAGERS_PATH = "standingsrequests.managers"
+
+BENCHMARK_ENABLED = bool(os.environ.get("SR_BENCHMARK"))
+BENCHMARK_SIZES = [
+    int(size)
+    for size in os.environ.get("SR_BENCHMARK_SIZES", "10000,50000,100000").split(",")
+]
+BENCHMARK_OUTPUT = os.environ.get("SR_BENCHMARK_OUTPUT", "benchmark_results.json")
+
+OWNER_CHARACTER_ID = 89_999_999
+
+
+class _QueryCounter:
+    """Counts executed DB queries and their total duration."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += perf_counter() - start
+
+
+def measure(func) -> dict:
+    """Run func and return wall time, DB queries and peak memory."""
+    counter = _QueryCounter()
+    tracemalloc.start()
+    start = perf_counter()
+    try:
+        with connection.execute_wrapper(counter):
+            func()
+        wall_time = perf_counter() - start
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_time_s": round(wall_time, 3),
+        "db_queries": counter.count,
+        "db_time_s": round(counter.duration, 3),
+        "peak_memory_kib": round(peak_memory / 1024),
+    }
+
+
+@skipUnless(BENCHMARK_ENABLED, "Benchmarks are only run when SR_BENCHMARK is set")
+@patch(CORE_PATH + ".STANDINGS_API_CHARID", OWNER_CHARACTER_ID)
+@patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+class TestBenchmarkStandingsSync(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        character = EveCharacter.objects.create(
+            character_id=OWNER_CHARACTER_ID,
+            character_name="Owner Character",
+            corporation_id=OWNER_CORPORATION_ID,
+            corporation_name="Owner Corporation",
+            corporation_ticker="OWN",
+            alliance_id=OWNER_ALLIANCE_ID,
+            alliance_name="Owner Alliance",
+            alliance_ticker="OWN",
+        )
+        user = AuthUtils.create_member("Owner Character")
+        add_character_to_user(
+            user, character, scopes=["esi-alliances.read_contacts.v1"]
+        )
+
+    @patch(MANAGERS_PATH + ".esi")
+    def run_stages(self, data: SyntheticStandingsData, mock_esi) -> list:
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            data.esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            data.esi_get_alliances_alliance_id_contacts
+        )
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            data.esi_post_characters_affiliation
+        )
+
+        def process_requests():
+            StandingRequest.objects.process_requests()
+            StandingRevocation.objects.process_requests()
+
+        stages = [
+            ("standings_update", tasks.standings_update),
+            ("process_requests", process_requests),
+            (
+                "affiliations_update_from_esi",
+                CharacterAffiliation.objects.update_from_esi,
+            ),
+        ]
+        results = []
+        for stage, func in stages:
+            result = {"stage": stage, "contacts": data.contacts_count}
+            result.update(measure(func))
+            results.append(result)
+
+        return results
+
+    def test_standings_sync(self):
+        results = []
+        for size in BENCHMARK_SIZES:
+            with transaction.atomic():
+                # given
+                data = SyntheticStandingsData(contacts_count=size)
+                data.create_all()
+                # when
+                results += self.run_stages(data)
+                # then
+                self.assertTrue(ContactSet.objects.current())
+                self.assertTrue(CharacterAffiliation.objects.exists())
+                # start each size with an empty database
+                transaction.set_rollback(True)
+
+        report = {
+            "app_version": __version__,
+            "created_at": now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "results": results,
+        }
+        with open(BENCHMARK_OUTPUT, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
@@ -0,0 +1,152 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from eveuniverse.models import EveEntity
+
+from app_utils.testing import NoSocketsTestCase
+
+from ..helpers.instrumentation import (
+    instrument_task,
+    record_esi_response,
+    stage,
+    with_current_run,
+)
+from ..models import TaskRun
+
+MODULE_PATH = "standingsrequests.helpers.instrumentation"
+
+
+def dummy_task():
+    with stage("first"):
+        EveEntity.objects.create(id=1001, name="Bruce Wayne", category="character")
+        record_esi_response(Mock(elapsed=timedelta(seconds=2)))
+    with stage("second"):
+        EveEntity.objects.filter(id=1001).update(name="Batman")
+        EveEntity.objects.count()
+
+
+@patch(MODULE_PATH + ".SR_TASK_INSTRUMENTATION_ENABLED", True)
+class TestInstrumentTask(NoSocketsTestCase):
+    def test_should_record_task_run_with_stages(self):
+        # when
+        instrument_task(dummy_task)()
+        # then
+        task_run = TaskRun.objects.get()
+        self.assertEqual(task_run.name, "dummy_task")
+        self.assertTrue(task_run.is_success)
+        self.assertEqual(task_run.esi_calls, 1)
+        self.assertEqual(task_run.esi_time, 2)
+        self.assertEqual(task_run.rows_written, 2)
+        first, second = task_run.stages.all()
+        self.assertEqual(first.name, "first")
+        self.assertEqual(first.esi_calls, 1)
+        self.assertEqual(first.rows_written, 1)
+        self.assertEqual(second.name, "second")
+        self.assertEqual(second.esi_calls, 0)
+        self.assertEqual(second.db_queries, 2)
+        self.assertEqual(second.rows_written, 1)
+        self.assertGreaterEqual(
+            task_run.db_queries, first.db_queries + second.db_queries
+        )
+
+    def test_should_record_failed_task_run(self):
+        # given
+        def failing_task():
+            raise RuntimeError()
+
+        # when
+        with self.assertRaises(RuntimeError):
+            instrument_task(failing_task)()
+        # then
+        task_run = TaskRun.objects.get()
+        self.assertFalse(task_run.is_success)
+
+    def test_should_record_nested_task_as_stage(self):
+        # given
+        def outer_task():
+            instrument_task(dummy_task)()
+
+        # when
+        instrument_task(outer_task)()
+        # then
+        task_run = TaskRun.objects.get()
+        self.assertEqual(task_run.name, "outer_task")
+        self.assertListEqual(
+            [obj.name for obj in task_run.stages.all()],
+            ["dummy_task", "first", "second"],
+        )
+
+    @patch(MODULE_PATH + "._report_run")
+    def test_should_keep_runs_of_concurrent_tasks_apart(self, mock_report_run):
+        # given
+        first_started = threading.Event()
+        second_finished = threading.Event()
+
+        def first_task():
+            first_started.set()
+            second_finished.wait(timeout=5)
+            record_esi_response(Mock(elapsed=timedelta(seconds=1)))
+
+        def second_task():
+            first_started.wait(timeout=5)
+            with stage("second_stage"):
+                record_esi_response(Mock(elapsed=timedelta(seconds=2)))
+            second_finished.set()
+
+        # when
+        threads = [
+            threading.Thread(target=instrument_task(task))
+            for task in [first_task, second_task]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # then
+        runs = {
+            call[0][0].task_name: call[0][0] for call in mock_report_run.call_args_list
+        }
+        self.assertSetEqual(set(runs.keys()), {"first_task", "second_task"})
+        self.assertEqual(runs["first_task"].totals.esi_time, 1)
+        self.assertListEqual(runs["first_task"].stages, [])
+        self.assertEqual(runs["second_task"].totals.esi_time, 2)
+        self.assertListEqual(
+            [stats.name for stats in runs["second_task"].stages], ["second_stage"]
+        )
+
+    def test_should_record_esi_calls_from_thread_pool(self):
+        # given
+        def fetch():
+            record_esi_response(Mock(elapsed=timedelta(seconds=2)))
+
+        def pool_task():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(with_current_run(fetch)) for _ in range(2)]
+            for future in futures:
+                future.result()
+
+        # when
+        instrument_task(pool_task)()
+        # then
+        task_run = TaskRun.objects.get()
+        self.assertEqual(task_run.esi_calls, 2)
+
+    def test_should_not_record_esi_calls_outside_task(self):
+        # when
+        record_esi_response(Mock(elapsed=timedelta(seconds=2)))
+        with stage("dummy"):
+            pass
+        # then
+        self.assertFalse(TaskRun.objects.exists())
+
+
+@patch(MODULE_PATH + ".SR_TASK_INSTRUMENTATION_ENABLED", False)
+class TestInstrumentTaskDisabled(NoSocketsTestCase):
+    def test_should_not_record_when_disabled(self):
+        # when
+        instrument_task(dummy_task)()
+        # then
+        self.assertEqual(EveEntity.objects.get(id=1001).name, "Batman")
+        self.assertFalse(TaskRun.objects.exists())
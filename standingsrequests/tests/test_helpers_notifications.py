@@ -0,0 +1,101 @@
+from django.test import override_settings
+
+from allianceauth.notifications.models import Notification
+from allianceauth.tests.auth_utils import AuthUtils
+from app_utils.testing import NoSocketsTestCase
+
+from ..helpers.notifications import NotificationOutbox
+
+
+class TestNotificationOutbox(NoSocketsTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_1 = AuthUtils.create_user("Bruce Wayne")
+        cls.user_2 = AuthUtils.create_user("Clark Kent")
+
+    def test_should_send_all_notifications(self):
+        # given
+        outbox = NotificationOutbox(digest=False)
+        outbox.add(self.user_1, "title 1", "message 1")
+        outbox.add(self.user_1, "title 2", "message 2", level="warning")
+        outbox.add(self.user_2, "title 3")
+        # when
+        result = outbox.send()
+        # then
+        self.assertEqual(result, 3)
+        notifications = set(
+            Notification.objects.values_list("user", "title", "message", "level")
+        )
+        expected = {
+            (self.user_1.pk, "title 1", "message 1", "info"),
+            (self.user_1.pk, "title 2", "message 2", "warning"),
+            (self.user_2.pk, "title 3", "title 3", "info"),
+        }
+        self.assertSetEqual(notifications, expected)
+        self.assertEqual(len(outbox), 0)
+
+    def test_should_do_nothing_when_empty(self):
+        # given
+        outbox = NotificationOutbox()
+        # when
+        result = outbox.send()
+        # then
+        self.assertEqual(result, 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_should_merge_notifications_per_user_in_digest_mode(self):
+        # given
+        outbox = NotificationOutbox(digest=True)
+        outbox.add(self.user_1, "title 1", "message 1")
+        outbox.add(self.user_1, "title 2", "message 2", level="warning")
+        outbox.add(self.user_2, "title 3", "message 3")
+        # when
+        result = outbox.send()
+        # then
+        self.assertEqual(result, 2)
+        digest = Notification.objects.get(user=self.user_1)
+        self.assertIn("2 standing changes", digest.title)
+        self.assertIn("title 1\nmessage 1", digest.message)
+        self.assertIn("title 2\nmessage 2", digest.message)
+        self.assertEqual(digest.level, "warning")
+        notification = Notification.objects.get(user=self.user_2)
+        self.assertEqual(notification.title, "title 3")
+
+    def test_should_use_info_level_for_invalid_levels(self):
+        # given
+        outbox = NotificationOutbox()
+        outbox.add(self.user_1, "title 1", level="invalid")
+        # when
+        outbox.send()
+        # then
+        self.assertEqual(Notification.objects.get().level, "info")
+
+    @override_settings(NOTIFICATIONS_MAX_PER_USER=2)
+    def test_should_remove_oldest_notifications_above_max_per_user(self):
+        # given
+        Notification.objects.create(user=self.user_1, title="old", message="old")
+        outbox = NotificationOutbox(digest=False)
+        outbox.add(self.user_1, "title 1")
+        outbox.add(self.user_1, "title 2")
+        outbox.add(self.user_2, "title 3")
+        # when
+        outbox.send()
+        # then
+        titles = set(
+            Notification.objects.filter(user=self.user_1).values_list(
+                "title", flat=True
+            )
+        )
+        self.assertSetEqual(titles, {"title 1", "title 2"})
+        self.assertEqual(Notification.objects.filter(user=self.user_2).count(), 1)
+
+    @override_settings(NOTIFICATIONS_MAX_PER_USER=-1)
+    def test_should_use_default_max_per_user_when_setting_is_invalid(self):
+        # given
+        Notification.objects.create(user=self.user_1, title="old", message="old")
+        outbox = NotificationOutbox(digest=False)
+        outbox.add(self.user_1, "title 1")
+        # when
+        outbox.send()
+        # then
+        self.assertEqual(Notification.objects.filter(user=self.user_1).count(), 2)
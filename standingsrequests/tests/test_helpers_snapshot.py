@@ -0,0 +1,142 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+from app_utils.testing import NoSocketsTestCase
+
+from ..helpers import snapshot
+from ..helpers.snapshot import (
+    StandingsSnapshot,
+    get_snapshot,
+    snapshot_version,
+    write_snapshot,
+)
+from ..models import ContactSet
+from .my_test_data import create_contacts_set
+
+MODULE_PATH = "standingsrequests.helpers.snapshot"
+
+
+class TestStandingsSnapshot(NoSocketsTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "snapshot.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_should_lookup_standings(self):
+        # given
+        StandingsSnapshot.write(
+            self.path, (1, 2), [(1003, 5.0), (1001, 10.0), (2001, -10.0)]
+        )
+        # when
+        obj = StandingsSnapshot(self.path)
+        # then
+        self.assertEqual(obj.version, (1, 2))
+        self.assertEqual(len(obj), 3)
+        self.assertEqual(obj.standing(1001), 10.0)
+        self.assertEqual(obj.standing(1003), 5.0)
+        self.assertEqual(obj.standing(2001), -10.0)
+        self.assertIsNone(obj.standing(1002))
+        self.assertIsNone(obj.standing(3001))
+        self.assertDictEqual(obj.standings([1001, 1002, 2001]), {1001: 10, 2001: -10})
+
+    def test_should_handle_empty_snapshot(self):
+        # given
+        StandingsSnapshot.write(self.path, (1, 2), [])
+        # when
+        obj = StandingsSnapshot(self.path)
+        # then
+        self.assertIsNone(obj.standing(1001))
+
+    def test_should_not_leave_temporary_files(self):
+        # when
+        StandingsSnapshot.write(self.path, (1, 2), [(1001, 10.0)])
+        StandingsSnapshot.write(self.path, (1, 3), [(1001, 5.0)])
+        # then
+        self.assertListEqual(os.listdir(self.tmp_dir.name), ["snapshot.bin"])
+        self.assertEqual(StandingsSnapshot(self.path).version, (1, 3))
+
+    def test_should_reject_invalid_file(self):
+        # given
+        with open(self.path, "wb") as file:
+            file.write(b"x" * 64)
+        # when/then
+        with self.assertRaises(ValueError):
+            StandingsSnapshot(self.path)
+
+
+@patch(MODULE_PATH + ".SR_STANDINGS_SNAPSHOT_ENABLED", True)
+class TestGetSnapshot(NoSocketsTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp_dir.name, "snapshot.bin")
+        patcher = patch(MODULE_PATH + ".SR_STANDINGS_SNAPSHOT_PATH", path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        snapshot._snapshot = None
+        self.contact_set = create_contacts_set()
+
+    def tearDown(self):
+        snapshot._snapshot = None
+        self.tmp_dir.cleanup()
+
+    def test_should_load_snapshot_for_set(self):
+        # given
+        write_snapshot(self.contact_set)
+        # when
+        obj = get_snapshot(self.contact_set)
+        # then
+        self.assertEqual(obj.version, snapshot_version(self.contact_set))
+        self.assertEqual(len(obj), self.contact_set.contacts.count())
+        contact = self.contact_set.contacts.first()
+        self.assertEqual(obj.standing(contact.eve_entity_id), contact.standing)
+
+    def test_should_lookup_standing_without_queries(self):
+        # given
+        contact = self.contact_set.contacts.first()
+        write_snapshot(self.contact_set)
+        get_snapshot(self.contact_set)
+        # when
+        with self.assertNumQueries(0):
+            standing = self.contact_set.contact_standing(contact.eve_entity_id)
+        # then
+        self.assertEqual(standing, contact.standing)
+
+    def test_should_reload_when_version_changes(self):
+        # given
+        write_snapshot(self.contact_set)
+        get_snapshot(self.contact_set)
+        new_set = create_contacts_set()
+        write_snapshot(new_set)
+        # when
+        obj = get_snapshot(new_set)
+        # then
+        self.assertEqual(obj.version, snapshot_version(new_set))
+
+    def test_should_not_write_missing_snapshot(self):
+        # when
+        obj = get_snapshot(self.contact_set)
+        # then
+        self.assertIsNone(obj)
+        self.assertListEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_should_return_none_when_snapshot_is_for_other_set(self):
+        # given
+        write_snapshot(self.contact_set)
+        other_set = ContactSet.objects.create(name="Staging Set")
+        # when/then
+        self.assertIsNone(get_snapshot(other_set))
+
+    def test_should_return_none_when_disabled(self):
+        # given
+        write_snapshot(self.contact_set)
+        # when/then
+        with patch(MODULE_PATH + ".SR_STANDINGS_SNAPSHOT_ENABLED", False):
+            self.assertIsNone(get_snapshot(self.contact_set))
+
+    def test_should_do_nothing_without_path(self):
+        with patch(MODULE_PATH + ".SR_STANDINGS_SNAPSHOT_PATH", None):
+            write_snapshot(self.contact_set)
+            self.assertIsNone(get_snapshot(self.contact_set))
@@ -3,11 +3,17 @@ from unittest.mock import Mock, patch
 
 from bravado.exception import HTTPError
 
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 from eveuniverse.models import EveEntity
 
 from allianceauth.eveonline.models import EveCharacter
+from allianceauth.notifications.models import Notification
 from allianceauth.tests.auth_utils import AuthUtils
+from app_utils.esi_testing import BravadoOperationStub
 from app_utils.testing import NoSocketsTestCase, add_character_to_user
 
 from ..core import BaseConfig
@@ -15,6 +21,7 @@ from ..models import (
     AbstractStandingsRequest,
     CharacterAffiliation,
     Contact,
+    ContactLabel,
     ContactSet,
     CorporationDetails,
     StandingRequest,
@@ -26,6 +33,7 @@ from .my_test_data import (
     TEST_STANDINGS_API_CHARNAME,
     create_contacts_set,
     create_entity,
+    create_eve_objects,
     create_standings_char,
     esi_get_alliances_alliance_id_contacts,
     esi_get_alliances_alliance_id_contacts_labels,
@@ -37,6 +45,8 @@ from .my_test_data import (
 CORE_PATH = "standingsrequests.core"
 MANAGERS_PATH = "standingsrequests.managers"
 MODELS_PATH = "standingsrequests.models"
+NOTIFICATIONS_PATH = "standingsrequests.helpers.notifications"
+EVEUNIVERSE_MANAGERS_PATH = "eveuniverse.managers"
 TEST_USER_NAME = "Peter Parker"
 
 
@@ -51,6 +61,9 @@ class TestContactSetManager(NoSocketsTestCase):
         )
         load_eve_entities()
 
+    def setUp(self):
+        cache.clear()
+
     @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
     @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
     @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
@@ -92,6 +105,157 @@ class TestContactSetManager(NoSocketsTestCase):
         }
         self.assertSetEqual(all_contacts, expected)
 
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_add_labels_to_contacts_from_api(self, mock_esi):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        # when
+        contact_set = ContactSet.objects.create_new_from_api()
+        # then
+        contact_1002 = contact_set.contacts.get(eve_entity_id=1002)
+        labels = set(contact_1002.labels.values_list("name", flat=True))
+        self.assertSetEqual(labels, {"blue", "green"})
+        for label in contact_1002.labels.all():
+            self.assertEqual(label.contact_set, contact_set)
+
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_fetch_all_contact_pages_from_api(self, mock_esi):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        # when
+        contact_set = ContactSet.objects.create_new_from_api()
+        # then
+        pages = {
+            kwargs["page"]
+            for _, kwargs in (
+                mock_Contacts.get_alliances_alliance_id_contacts.call_args_list
+            )
+        }
+        self.assertSetEqual(pages, {1, 2, 3})
+        self.assertEqual(contact_set.contacts.count(), 14)
+
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_activate_new_contact_set_from_api(self, mock_esi):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        create_contacts_set()
+        # when
+        contact_set = ContactSet.objects.create_new_from_api()
+        # then
+        self.assertEqual(ContactSet.objects.current(), contact_set)
+
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_keep_current_set_when_contacts_unchanged(self, mock_esi):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        ContactSet.objects.all().delete()
+        set_1 = ContactSet.objects.create_new_from_api()
+        # when
+        set_2 = ContactSet.objects.create_new_from_api()
+        # then
+        self.assertEqual(set_1, set_2)
+        self.assertEqual(ContactSet.objects.count(), 1)
+        set_1.refresh_from_db()
+        self.assertIsNotNone(set_1.verified_at)
+
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".write_snapshot")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_write_snapshot_when_contacts_unchanged(
+        self, mock_esi, mock_write_snapshot
+    ):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        ContactSet.objects.all().delete()
+        set_1 = ContactSet.objects.create_new_from_api()
+        mock_write_snapshot.reset_mock()
+        # when
+        ContactSet.objects.create_new_from_api()
+        # then
+        mock_write_snapshot.assert_called_once_with(set_1)
+
+    @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
+    @patch(CORE_PATH + ".SR_OPERATION_MODE", "alliance")
+    @patch(MANAGERS_PATH + ".esi")
+    def test_should_create_new_set_when_contacts_changed(self, mock_esi):
+        # given
+        mock_Contacts = mock_esi.client.Contacts
+        mock_Contacts.get_alliances_alliance_id_contacts_labels.side_effect = (
+            esi_get_alliances_alliance_id_contacts_labels
+        )
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = (
+            esi_get_alliances_alliance_id_contacts
+        )
+        ContactSet.objects.all().delete()
+        set_1 = ContactSet.objects.create_new_from_api()
+        contacts = esi_get_alliances_alliance_id_contacts().results()
+        contacts[0]["standing"] = -10
+        mock_Contacts.get_alliances_alliance_id_contacts.side_effect = None
+        mock_Contacts.get_alliances_alliance_id_contacts.return_value = (
+            BravadoOperationStub(contacts)
+        )
+        # when
+        set_2 = ContactSet.objects.create_new_from_api()
+        # then
+        self.assertNotEqual(set_1, set_2)
+        self.assertEqual(ContactSet.objects.current(), set_2)
+
+    def test_current_should_return_active_set_not_latest(self):
+        # given
+        set_1 = create_contacts_set()
+        ContactSet.objects.create(name="Staging Set")
+        # when
+        result = ContactSet.objects.current()
+        # then
+        self.assertEqual(result, set_1)
+
+    def test_current_should_raise_exception_when_no_set_is_active(self):
+        # given
+        ContactSet.objects.all().delete()
+        ContactSet.objects.create(name="Staging Set")
+        # when/then
+        with self.assertRaises(ContactSet.DoesNotExist):
+            ContactSet.objects.current()
+
     @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
     def test_standings_character_exists(self):
         character = create_standings_char()
@@ -113,6 +277,123 @@ class TestContactSetManager(NoSocketsTestCase):
         self.assertTrue(EveEntity.objects.filter(id=TEST_STANDINGS_API_CHARID).exists())
 
 
+class TestContactSetManagerCurrentHandle(NoSocketsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.set_1 = create_contacts_set()
+
+    def test_should_return_current_set_from_cache(self):
+        # given
+        ContactSet.objects.current()
+        # when
+        with self.assertNumQueries(0):
+            result = ContactSet.objects.current()
+        # then
+        self.assertEqual(result, self.set_1)
+        self.assertEqual(result.date, self.set_1.date)
+
+    def test_should_return_handle_with_contacts_count(self):
+        # when
+        handle = ContactSet.objects.current_handle()
+        # then
+        self.assertEqual(handle["id"], self.set_1.pk)
+        self.assertEqual(handle["contacts_count"], self.set_1.contacts.count())
+
+    def test_should_update_handle_when_new_set_is_activated(self):
+        # given
+        ContactSet.objects.current()
+        set_2 = ContactSet.objects.create(name="Dummy Set")
+        # when
+        set_2.activate()
+        # then
+        self.assertEqual(ContactSet.objects.current(), set_2)
+
+    def test_should_not_restore_old_handle_after_activation(self):
+        # given
+        old_handle = ContactSet.objects._current_handle_from_db()
+        set_2 = ContactSet.objects.create(name="Dummy Set")
+        # when
+        set_2.activate()
+        cache.add(ContactSet.objects.CURRENT_HANDLE_CACHE_KEY, old_handle)
+        # then
+        self.assertEqual(ContactSet.objects.current(), set_2)
+
+    def test_should_remove_handle_when_active_set_is_deleted(self):
+        # given
+        ContactSet.objects.current()
+        # when
+        self.set_1.delete()
+        # then
+        with self.assertRaises(ContactSet.DoesNotExist):
+            ContactSet.objects.current()
+
+
+class TestContactSetManagerPurgeStale(NoSocketsTestCase):
+    def setUp(self):
+        ContactSet.objects.all().delete()
+        self.set_1 = create_contacts_set()
+        self.set_1.date = now() - timedelta(hours=2)
+        self.set_1.save()
+        self.set_2 = create_contacts_set()
+        self.cutoff_date = now() - timedelta(hours=1)
+
+    @patch(MANAGERS_PATH + ".ContactSetManager.PURGE_BATCH_SIZE", 2)
+    def test_should_purge_stale_sets_in_batches(self):
+        # when
+        result = ContactSet.objects.purge_stale(self.cutoff_date)
+        # then
+        self.assertTrue(result)
+        self.assertFalse(ContactSet.objects.filter(pk=self.set_1.pk).exists())
+        self.assertFalse(Contact.objects.filter(contact_set=self.set_1).exists())
+        self.assertFalse(ContactLabel.objects.filter(contact_set=self.set_1).exists())
+        self.assertFalse(
+            Contact.labels.through.objects.filter(
+                contact__contact_set=self.set_1
+            ).exists()
+        )
+        self.assertTrue(self.set_2.contacts.exists())
+        self.assertTrue(
+            Contact.labels.through.objects.filter(
+                contact__contact_set=self.set_2
+            ).exists()
+        )
+
+    def test_should_not_purge_active_set(self):
+        # given
+        self.set_2.date = now() - timedelta(hours=2)
+        self.set_2.save()
+        # when
+        ContactSet.objects.purge_stale(self.cutoff_date)
+        # then
+        self.assertEqual(
+            set(ContactSet.objects.values_list("pk", flat=True)), {self.set_2.pk}
+        )
+
+    @patch(MANAGERS_PATH + ".ContactSetManager.PURGE_BATCH_SIZE", 2)
+    @patch(MANAGERS_PATH + ".perf_counter")
+    def test_should_stop_when_time_budget_is_exhausted(self, mock_perf_counter):
+        # given
+        mock_perf_counter.side_effect = [0, 1, 2, 10, 11]
+        contacts_count = self.set_1.contacts.count()
+        # when
+        result = ContactSet.objects.purge_stale(self.cutoff_date, time_budget=5)
+        # then
+        self.assertFalse(result)
+        self.assertTrue(ContactSet.objects.filter(pk=self.set_1.pk).exists())
+        self.assertEqual(self.set_1.contacts.count(), contacts_count - 4)
+
+    @patch(MANAGERS_PATH + ".perf_counter")
+    def test_should_continue_interrupted_purge(self, mock_perf_counter):
+        # given
+        mock_perf_counter.side_effect = [0, 10, 0]
+        ContactSet.objects.purge_stale(self.cutoff_date, time_budget=5)
+        # when
+        result = ContactSet.objects.purge_stale(self.cutoff_date)
+        # then
+        self.assertTrue(result)
+        self.assertFalse(ContactSet.objects.filter(pk=self.set_1.pk).exists())
+
+
 class TestAbstractStandingsRequestManager(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls):
@@ -153,8 +434,7 @@ class TestAbstractStandingsRequestManager(NoSocketsTestCase):
 
 @patch(MANAGERS_PATH + ".SR_NOTIFICATIONS_ENABLED", True)
 @patch(CORE_PATH + ".STANDINGS_API_CHARID", TEST_STANDINGS_API_CHARID)
-@patch(MODELS_PATH + ".SR_STANDING_TIMEOUT_HOURS", 24)
-@patch(MANAGERS_PATH + ".notify")
+@patch(MANAGERS_PATH + ".SR_STANDING_TIMEOUT_HOURS", 24)
 class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
     def setUp(self):
         self.user_manager = AuthUtils.create_user("Mike Manager")
@@ -163,9 +443,7 @@ class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
         self.contact_set = create_contacts_set()
         create_standings_char()
 
-    def test_when_pilot_standing_satisfied_in_game_mark_effective_and_inform_user(
-        self, mock_notify
-    ):
+    def test_when_pilot_standing_satisfied_in_game_mark_effective_and_inform_user(self):
         my_request = StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=1002,
@@ -179,11 +457,10 @@ class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
         self.assertIsNotNone(my_request.effective_date)
         self.assertEqual(my_request.action_by, self.user_manager)
         self.assertIsNotNone(my_request.action_date)
-        self.assertEqual(mock_notify.call_count, 1)
-        args, kwargs = mock_notify.call_args
-        self.assertEqual(kwargs["user"], self.user_requestor)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.user_requestor)
 
-    def test_dont_inform_user_when_sr_was_effective_before(self, mock_notify):
+    def test_dont_inform_user_when_sr_was_effective_before(self):
         my_request = StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=1002,
@@ -199,11 +476,9 @@ class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
         self.assertIsNotNone(my_request.effective_date)
         self.assertEqual(my_request.action_by, self.user_manager)
         self.assertIsNotNone(my_request.action_date)
-        self.assertEqual(mock_notify.call_count, 0)
+        self.assertEqual(Notification.objects.count(), 0)
 
-    def test_when_corporation_standing_satisfied_in_game_mark_effective(
-        self, mock_notify
-    ):
+    def test_when_corporation_standing_satisfied_in_game_mark_effective(self):
         my_request = StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=2003,
@@ -217,9 +492,10 @@ class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
         self.assertIsNotNone(my_request.effective_date)
         self.assertEqual(my_request.action_by, self.user_manager)
         self.assertIsNotNone(my_request.action_date)
-        self.assertTrue(mock_notify.called)
+        self.assertTrue(Notification.objects.exists())
 
-    def test_notify_about_requests_that_are_reset_and_timed_out(self, mock_notify):
+    def test_should_not_reset_timed_out_requests(self):
+        # given
         StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=1008,
@@ -227,60 +503,426 @@ class TestAbstractStandingsRequestProcessRequests(NoSocketsTestCase):
             action_by=self.user_manager,
             action_date=now() - timedelta(hours=25),
         )
-        StandingRequest.objects.process_requests()
-        self.assertEqual(mock_notify.call_count, 2)
+        # when
+        StandingRequest.objects.process_requests()
+        # then
+        my_request = StandingRequest.objects.get(contact_id=1008)
+        self.assertEqual(my_request.action_by, self.user_manager)
+        self.assertEqual(Notification.objects.count(), 0)
+
+    def test_no_action_when_actioned_standing_but_not_in_game_yet(self):
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        self.contact_set.contacts.get(eve_entity_id=1002).delete()
+        StandingRequest.objects.process_requests()
+        my_request.refresh_from_db()
+        self.assertFalse(my_request.is_effective)
+        self.assertIsNone(my_request.effective_date)
+        self.assertEqual(Notification.objects.count(), 0)
+
+    def test_delete_effective_request_not_satisfied_in_game_and_add_revocation(self):
+        # given
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+            is_effective=True,
+            effective_date=now(),
+        )
+        # when
+        StandingRequest.objects.process_requests()
+        # then
+        self.assertFalse(StandingRequest.objects.filter(pk=my_request.pk).exists())
+        my_revocation = StandingRevocation.objects.get(contact_id=1008)
+        self.assertEqual(my_revocation.user, self.user_requestor)
+        self.assertEqual(
+            my_revocation.reason, StandingRevocation.Reason.REVOKED_IN_GAME
+        )
+
+    def test_delete_request_and_revocation_when_revocation_satisfied_in_game(self):
+        # given
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        StandingRevocation.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        # when
+        StandingRevocation.objects.process_requests()
+        # then
+        self.assertFalse(StandingRequest.objects.filter(contact_id=1008).exists())
+        self.assertFalse(StandingRevocation.objects.filter(contact_id=1008).exists())
+        self.assertEqual(Notification.objects.count(), 1)
+
+    @patch(NOTIFICATIONS_PATH + ".SR_NOTIFICATIONS_DIGEST_ENABLED", True)
+    def test_should_merge_notifications_to_same_user_in_digest_mode(self):
+        # given
+        for contact_id in [1001, 1002]:
+            StandingRequest.objects.create(
+                user=self.user_requestor,
+                contact_id=contact_id,
+                contact_type_id=CHARACTER_TYPE_ID,
+                action_by=self.user_manager,
+                action_date=now(),
+            )
+        # when
+        StandingRequest.objects.process_requests()
+        # then
+        notification = Notification.objects.get()
+        self.assertEqual(notification.user, self.user_requestor)
+        self.assertIn("2 standing changes", notification.title)
+
+    def test_should_only_process_requests_for_given_contacts(self):
+        # given
+        request_1 = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        request_2 = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        # when
+        StandingRequest.objects.process_requests(
+            contact_ids={1001}, requested_since=now()
+        )
+        # then
+        request_1.refresh_from_db()
+        self.assertTrue(request_1.is_effective)
+        request_2.refresh_from_db()
+        self.assertFalse(request_2.is_effective)
+
+    def test_should_process_new_requests_when_contacts_given(self):
+        # given
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+        )
+        # when
+        StandingRequest.objects.process_requests(
+            contact_ids=set(), requested_since=now() - timedelta(hours=1)
+        )
+        # then
+        my_request.refresh_from_db()
+        self.assertTrue(my_request.is_effective)
+
+    def test_queries_do_not_depend_on_unchanged_requests(self):
+        # given
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            is_effective=True,
+            effective_date=now(),
+        )
+        with CaptureQueriesContext(connection) as one_request_queries:
+            StandingRequest.objects.process_requests()
+        for contact_id in [1002, 1003, 1010]:
+            StandingRequest.objects.create(
+                user=self.user_requestor,
+                contact_id=contact_id,
+                contact_type_id=CHARACTER_TYPE_ID,
+                is_effective=True,
+                effective_date=now(),
+            )
+        # when
+        with CaptureQueriesContext(connection) as many_requests_queries:
+            StandingRequest.objects.process_requests()
+        # then
+        self.assertEqual(len(many_requests_queries), len(one_request_queries))
+
+    def test_raise_exception_when_called_from_abstract_object(self):
+        with self.assertRaises(TypeError):
+            AbstractStandingsRequest.objects.process_requests()
+
+    def test_pending_request(self):
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            is_effective=False,
+        )
+        self.assertTrue(AbstractStandingsRequest.objects.has_pending_request(1001))
+
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now(),
+            is_effective=True,
+            effective_date=now(),
+        )
+        self.assertFalse(AbstractStandingsRequest.objects.has_pending_request(1002))
+
+
+@patch(MANAGERS_PATH + ".SR_NOTIFICATIONS_ENABLED", True)
+@patch(MANAGERS_PATH + ".SR_STANDING_TIMEOUT_HOURS", 24)
+class TestAbstractStandingsRequestResetTimedOut(NoSocketsTestCase):
+    def setUp(self):
+        self.user_manager = AuthUtils.create_user("Mike Manager")
+        self.user_requestor = AuthUtils.create_user("Roger Requestor")
+        ContactSet.objects.all().delete()
+        self.contact_set = create_contacts_set()
+
+    def test_should_reset_timed_out_requests_and_notify_users(self):
+        # given
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+        )
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 1)
+        my_request.refresh_from_db()
+        self.assertIsNone(my_request.action_by)
+        self.assertIsNone(my_request.action_date)
+        users = set(Notification.objects.values_list("user", flat=True))
+        self.assertSetEqual(users, {self.user_manager.pk, self.user_requestor.pk})
+
+    def test_should_not_reset_requests_before_timeout(self):
+        # given
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=1),
+        )
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 0)
+        my_request.refresh_from_db()
+        self.assertEqual(my_request.action_by, self.user_manager)
+        self.assertEqual(Notification.objects.count(), 0)
+
+    def test_should_not_reset_effective_requests(self):
+        # given
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+            is_effective=True,
+            effective_date=now(),
+        )
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 0)
+
+    def test_should_not_reset_requests_with_satisfied_standing(self):
+        # given
+        create_standings_char()
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+        )
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 0)
+        my_request.refresh_from_db()
+        self.assertEqual(my_request.action_by, self.user_manager)
+        self.assertTrue(my_request.is_effective)
+        self.assertFalse(Notification.objects.filter(user=self.user_manager).exists())
+
+    def test_should_compare_timeout_with_last_verified_contact_set(self):
+        # given
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+        )
+        ContactSet.objects.filter(pk=self.contact_set.pk).update(
+            date=now() - timedelta(hours=26)
+        )
+        ContactSet.objects.refresh_current_handle()
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 0)
+        my_request.refresh_from_db()
+        self.assertIsNotNone(my_request.action_by)
+
+    def test_should_do_nothing_without_contact_set(self):
+        # given
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1008,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+        )
+        ContactSet.objects.all().delete()
+        # when
+        result = StandingRequest.objects.reset_timed_out()
+        # then
+        self.assertEqual(result, 0)
+
+
+class TestAbstractStandingsRequestContactIdRanges(NoSocketsTestCase):
+    def setUp(self):
+        self.user = AuthUtils.create_user("Roger Requestor")
+        for contact_id in [1001, 1002, 1003, 1004]:
+            StandingRequest.objects.create(
+                user=self.user,
+                contact_id=contact_id,
+                contact_type_id=CHARACTER_TYPE_ID,
+            )
+        StandingRevocation.objects.add_revocation(
+            1005, StandingRevocation.CHARACTER_CONTACT_TYPE
+        )
+        StandingRevocation.objects.add_revocation(
+            1006, StandingRevocation.CHARACTER_CONTACT_TYPE
+        )
 
-    def test_dont_notify_about_requests_that_are_reset_and_not_timed_out(
-        self, mock_notify
-    ):
-        StandingRequest.objects.create(
-            user=self.user_requestor,
-            contact_id=1008,
-            contact_type_id=CHARACTER_TYPE_ID,
-            action_by=self.user_manager,
-            action_date=now() - timedelta(hours=1),
-        )
-        StandingRequest.objects.process_requests()
-        self.assertEqual(mock_notify.call_count, 0)
+    def test_should_split_requests_and_revocations_into_ranges(self):
+        # when
+        result = AbstractStandingsRequest.objects.contact_id_ranges(3)
+        # then
+        self.assertListEqual(result, [(None, 1003), (1003, 1005), (1005, None)])
 
-    def test_no_action_when_actioned_standing_but_not_in_game_yet(self, mock_notify):
-        my_request = StandingRequest.objects.create(
-            user=self.user_requestor,
-            contact_id=1002,
-            contact_type_id=CHARACTER_TYPE_ID,
-            action_by=self.user_manager,
-            action_date=now(),
+    def test_should_not_return_more_ranges_than_contacts(self):
+        # when
+        result = AbstractStandingsRequest.objects.contact_id_ranges(10)
+        # then
+        self.assertEqual(len(result), 6)
+
+    def test_should_return_one_open_range_without_requests(self):
+        # given
+        AbstractStandingsRequest.objects.all().delete()
+        # when
+        result = AbstractStandingsRequest.objects.contact_id_ranges(3)
+        # then
+        self.assertListEqual(result, [(None, None)])
+
+    def test_should_process_only_requests_in_range(self):
+        # given
+        create_contacts_set()
+        create_standings_char()
+        # when
+        StandingRequest.objects.process_requests(contact_id_range=(1002, 1004))
+        # then
+        self.assertSetEqual(
+            set(
+                StandingRequest.objects.filter(is_effective=True).values_list(
+                    "contact_id", flat=True
+                )
+            ),
+            {1002, 1003},
         )
-        self.contact_set.contacts.get(eve_entity_id=1002).delete()
-        StandingRequest.objects.process_requests()
-        my_request.refresh_from_db()
-        self.assertFalse(my_request.is_effective)
-        self.assertIsNone(my_request.effective_date)
-        self.assertEqual(mock_notify.call_count, 0)
 
-    def test_raise_exception_when_called_from_abstract_object(self, mock_notify):
-        with self.assertRaises(TypeError):
-            AbstractStandingsRequest.objects.process_requests()
 
-    def test_pending_request(self, mock_notify):
-        StandingRequest.objects.create(
+class TestAbstractStandingsRequestQuerySetBulk(NoSocketsTestCase):
+    def setUp(self):
+        self.user_manager = AuthUtils.create_user("Mike Manager")
+        self.user_requestor = AuthUtils.create_user("Roger Requestor")
+        self.request_1 = StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=1001,
             contact_type_id=CHARACTER_TYPE_ID,
-            is_effective=False,
         )
-        self.assertTrue(AbstractStandingsRequest.objects.has_pending_request(1001))
-
-        StandingRequest.objects.create(
+        self.request_2 = StandingRequest.objects.create(
             user=self.user_requestor,
             contact_id=1002,
             contact_type_id=CHARACTER_TYPE_ID,
-            action_by=self.user_manager,
-            action_date=now(),
-            is_effective=True,
-            effective_date=now(),
         )
-        self.assertFalse(AbstractStandingsRequest.objects.has_pending_request(1002))
+        self.request_3 = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1003,
+            contact_type_id=CHARACTER_TYPE_ID,
+        )
+
+    def test_should_mark_actioned(self):
+        # given
+        my_date = now() - timedelta(hours=1)
+        # when
+        result = StandingRequest.objects.filter(
+            contact_id__in=[1001, 1002]
+        ).bulk_mark_actioned(self.user_manager, my_date)
+        # then
+        self.assertEqual(result, 2)
+        for my_request in [self.request_1, self.request_2]:
+            my_request.refresh_from_db()
+            self.assertEqual(my_request.action_by, self.user_manager)
+            self.assertEqual(my_request.action_date, my_date)
+        self.request_3.refresh_from_db()
+        self.assertIsNone(self.request_3.action_by)
+        self.assertIsNone(self.request_3.action_date)
+
+    def test_should_mark_effective(self):
+        # when
+        result = StandingRequest.objects.filter(
+            contact_id__in=[1001, 1002]
+        ).bulk_mark_effective()
+        # then
+        self.assertEqual(result, 2)
+        for my_request in [self.request_1, self.request_2]:
+            my_request.refresh_from_db()
+            self.assertTrue(my_request.is_effective)
+            self.assertIsNotNone(my_request.effective_date)
+        self.request_3.refresh_from_db()
+        self.assertFalse(self.request_3.is_effective)
+
+    def test_should_reset(self):
+        # given
+        StandingRequest.objects.all().bulk_mark_actioned(self.user_manager)
+        StandingRequest.objects.all().bulk_mark_effective()
+        # when
+        result = StandingRequest.objects.filter(contact_id=1001).bulk_reset()
+        # then
+        self.assertEqual(result, 1)
+        self.request_1.refresh_from_db()
+        self.assertFalse(self.request_1.is_effective)
+        self.assertIsNone(self.request_1.effective_date)
+        self.assertIsNone(self.request_1.action_by)
+        self.assertIsNone(self.request_1.action_date)
+        self.request_2.refresh_from_db()
+        self.assertTrue(self.request_2.is_effective)
+
+    def test_should_mark_actioned_with_one_update(self):
+        # when
+        with CaptureQueriesContext(connection) as queries:
+            StandingRequest.objects.all().bulk_mark_actioned(self.user_manager)
+        # then
+        updates = [query for query in queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
 
 
 class TestAbstractStandingsRequestAnnotations(NoSocketsTestCase):
@@ -315,7 +957,6 @@ class TestAbstractStandingsRequestAnnotations(NoSocketsTestCase):
         self.assertFalse(requests.get(pk=r2.pk).is_pending_annotated)
 
 
-@patch(MODELS_PATH + ".StandingRequest.can_request_corporation_standing")
 class TestStandingsRequestValidateRequests(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls):
@@ -326,9 +967,7 @@ class TestStandingsRequestValidateRequests(NoSocketsTestCase):
     def setUp(self):
         StandingRequest.objects.all().delete()
 
-    def test_do_nothing_character_request_is_valid(
-        self, mock_can_request_corporation_standing
-    ):
+    def test_do_nothing_character_request_is_valid(self):
         AuthUtils.add_permission_to_user_by_name(
             StandingRequest.REQUEST_PERMISSION_NAME, self.user
         )
@@ -340,7 +979,7 @@ class TestStandingsRequestValidateRequests(NoSocketsTestCase):
         self.assertTrue(StandingRequest.objects.filter(pk=request.pk).exists())
 
     def test_create_revocation_if_users_character_has_standing_but_user_no_permission(
-        self, mock_can_request_corporation_standing
+        self,
     ):
         StandingRequest.objects.get_or_create_2(
             self.user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
@@ -351,36 +990,157 @@ class TestStandingsRequestValidateRequests(NoSocketsTestCase):
             my_revocation.reason, StandingRevocation.Reason.LOST_PERMISSION
         )
 
-    def test_create_revocation_if_users_corporation_is_missing_apis(
-        self, mock_can_request_corporation_standing
-    ):
-        mock_can_request_corporation_standing.return_value = False
+    def _add_corporation_members_to_user(self, character_ids: list, member_count: int):
+        create_eve_objects()
+        load_eve_entities()
+        CorporationDetails.objects.create(
+            corporation_id=2001, ceo_id=1001, member_count=member_count, ticker="WYE"
+        )
+        for character_id in character_ids:
+            add_character_to_user(
+                self.user,
+                EveCharacter.objects.get(character_id=character_id),
+                scopes=["publicData"],
+            )
+
+    def test_create_revocation_if_users_corporation_is_missing_apis(self):
+        # given
+        self._add_corporation_members_to_user([1001, 1002], member_count=3)
         AuthUtils.add_permission_to_user_by_name(
             StandingRequest.REQUEST_PERMISSION_NAME, self.user
         )
         StandingRequest.objects.get_or_create_2(
             self.user, 2001, StandingRequest.CORPORATION_CONTACT_TYPE
         )
-
+        # when
         StandingRequest.objects.validate_requests()
+        # then
         my_revocation = StandingRevocation.objects.get(contact_id=2001)
         self.assertEqual(
             my_revocation.reason, StandingRevocation.Reason.MISSING_CORP_TOKEN
         )
 
-    def test_keep_corp_standing_request_if_all_apis_recorded(
-        self, mock_can_request_corporation_standing
-    ):
-        mock_can_request_corporation_standing.return_value = True
+    def test_keep_corp_standing_request_if_all_apis_recorded(self):
+        # given
+        self._add_corporation_members_to_user([1001, 1002, 1003], member_count=3)
         AuthUtils.add_permission_to_user_by_name(
             StandingRequest.REQUEST_PERMISSION_NAME, self.user
         )
         request = StandingRequest.objects.get_or_create_2(
             self.user, 2001, StandingRequest.CORPORATION_CONTACT_TYPE
         )
-
+        # when
         StandingRequest.objects.validate_requests()
+        # then
         self.assertTrue(StandingRequest.objects.filter(pk=request.pk).exists())
+        self.assertFalse(StandingRevocation.objects.exists())
+
+    def test_should_accept_permission_from_group(self):
+        # given
+        group = Group.objects.create(name="Standings")
+        AuthUtils.add_permissions_to_groups(
+            [AuthUtils.get_permission_by_name(StandingRequest.REQUEST_PERMISSION_NAME)],
+            [group],
+        )
+        self.user.groups.add(group)
+        StandingRequest.objects.get_or_create_2(
+            self.user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        # when
+        result = StandingRequest.objects.validate_requests()
+        # then
+        self.assertEqual(result, 0)
+        self.assertFalse(StandingRevocation.objects.exists())
+
+    def test_should_accept_permission_from_state(self):
+        # given
+        state = AuthUtils.create_state("Standings Test", 75)
+        state.permissions.add(
+            AuthUtils.get_permission_by_name(StandingRequest.REQUEST_PERMISSION_NAME)
+        )
+        user = AuthUtils.create_user("Clark Kent")
+        AuthUtils.assign_state(user, state, disconnect_signals=True)
+        StandingRequest.objects.get_or_create_2(
+            user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        # when
+        result = StandingRequest.objects.validate_requests()
+        # then
+        self.assertEqual(result, 0)
+        self.assertFalse(StandingRevocation.objects.exists())
+
+    def test_should_create_revocation_for_inactive_user(self):
+        # given
+        user = AuthUtils.create_user("Clark Kent")
+        AuthUtils.add_permission_to_user_by_name(
+            StandingRequest.REQUEST_PERMISSION_NAME, user
+        )
+        user.is_active = False
+        user.save()
+        StandingRequest.objects.get_or_create_2(
+            user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        # when
+        result = StandingRequest.objects.validate_requests()
+        # then
+        self.assertEqual(result, 1)
+        self.assertTrue(StandingRevocation.objects.filter(contact_id=1002).exists())
+
+    def test_should_not_create_revocation_when_one_is_pending(self):
+        # given
+        StandingRequest.objects.get_or_create_2(
+            self.user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        StandingRevocation.objects.add_revocation(
+            1002, StandingRevocation.CHARACTER_CONTACT_TYPE, user=self.user
+        )
+        # when
+        result = StandingRequest.objects.validate_requests()
+        # then
+        self.assertEqual(result, 1)
+        self.assertEqual(StandingRevocation.objects.filter(contact_id=1002).count(), 1)
+
+    def test_should_validate_requests_of_given_users_only(self):
+        # given
+        user = AuthUtils.create_user("Clark Kent")
+        StandingRequest.objects.get_or_create_2(
+            self.user, 1002, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        StandingRequest.objects.get_or_create_2(
+            user, 1003, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        # when
+        result = StandingRequest.objects.validate_requests([user.pk])
+        # then
+        self.assertEqual(result, 1)
+        self.assertSetEqual(
+            set(StandingRevocation.objects.values_list("contact_id", flat=True)),
+            {1003},
+        )
+
+    def test_should_resolve_permissions_with_constant_queries(self):
+        # given
+        AuthUtils.add_permission_to_user_by_name(
+            StandingRequest.REQUEST_PERMISSION_NAME, self.user
+        )
+        StandingRequest.objects.get_or_create_2(
+            self.user, 1001, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        with CaptureQueriesContext(connection) as one_request_queries:
+            StandingRequest.objects.validate_requests()
+        for contact_id in [1002, 1003, 1004]:
+            user = AuthUtils.create_user(f"User {contact_id}")
+            AuthUtils.add_permission_to_user_by_name(
+                StandingRequest.REQUEST_PERMISSION_NAME, user
+            )
+            StandingRequest.objects.get_or_create_2(
+                user, contact_id, StandingRequest.CHARACTER_CONTACT_TYPE
+            )
+        # when
+        with CaptureQueriesContext(connection) as many_requests_queries:
+            StandingRequest.objects.validate_requests()
+        # then
+        self.assertEqual(len(many_requests_queries), len(one_request_queries))
 
 
 class TestStandingsRequestManager(NoSocketsTestCase):
@@ -423,6 +1183,7 @@ class TestStandingsRevocationManager(NoSocketsTestCase):
         Contact.objects.create(contact_set=my_set, eve_entity_id=1005, standing=0)
         Contact.objects.create(contact_set=my_set, eve_entity_id=1008, standing=-5)
         Contact.objects.create(contact_set=my_set, eve_entity_id=1009, standing=-10)
+        my_set.activate()
         self.user_manager = AuthUtils.create_user("Mike Manager")
         self.user_requestor = AuthUtils.create_user("Roger Requestor")
 
@@ -511,14 +1272,225 @@ class TestCharacterAffiliationsManager(NoSocketsTestCase):
         assoc.refresh_from_db()
         self.assertEqual(assoc.corporation_id, 2001)
 
-    def test_should_handle_exception_from_api(self, mock_esi):
+    def test_should_delete_assocs_of_characters_no_longer_tracked(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            esi_post_characters_affiliation
+        )
+        create_contacts_set(include_assoc=True)
+        character = EveEntity.objects.create(
+            id=1099, name="Obsolete Character", category=EveEntity.CATEGORY_CHARACTER
+        )
+        CharacterAffiliation.objects.create(
+            character=character, corporation=EveEntity.objects.get(id=2001)
+        )
+        # when
+        CharacterAffiliation.objects.update_from_esi()
+        # then
+        self.assertFalse(
+            CharacterAffiliation.objects.filter(character_id=1099).exists()
+        )
+
+    def test_should_not_touch_unchanged_assocs(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            esi_post_characters_affiliation
+        )
+        create_contacts_set(include_assoc=True)
+        eve_character_1002 = create_entity(EveCharacter, 1002)
+        CharacterAffiliation.objects.filter(character_id=1002).update(
+            eve_character=eve_character_1002
+        )
+        assoc = CharacterAffiliation.objects.get(character_id=1001)
+        assoc.corporation = EveEntity.objects.get(id=2003)
+        assoc.save()
+        updated = CharacterAffiliation.objects.get(character_id=1002).updated
+        # when
+        CharacterAffiliation.objects.update_from_esi()
+        # then
+        unchanged_assoc = CharacterAffiliation.objects.get(character_id=1002)
+        self.assertEqual(unchanged_assoc.eve_character, eve_character_1002)
+        self.assertEqual(unchanged_assoc.updated, updated)
+        assoc.refresh_from_db()
+        self.assertEqual(assoc.corporation_id, 2001)
+        self.assertGreater(assoc.updated, updated)
+
+    @patch(EVEUNIVERSE_MANAGERS_PATH + ".EveEntityQuerySet.update_from_esi")
+    def test_should_create_missing_entities_in_bulk(
+        self, mock_update_from_esi, mock_esi
+    ):
+        # given
+        create_contacts_set(include_assoc=False)
+        affiliations = [
+            {"character_id": 1001, "corporation_id": 2001, "alliance_id": 3001},
+            {"character_id": 1002, "corporation_id": 2098, "faction_id": 500001},
+        ]
+        # when
+        with CaptureQueriesContext(connection) as queries:
+            CharacterAffiliation.objects._store_affiliations(affiliations)
+        # then
+        self.assertEqual(EveEntity.objects.filter(id__in=[2098, 500001]).count(), 2)
+        assoc = CharacterAffiliation.objects.get(character_id=1002)
+        self.assertEqual(assoc.corporation_id, 2098)
+        self.assertEqual(assoc.faction_id, 500001)
+        self.assertTrue(mock_update_from_esi.called)
+        entity_queries = [
+            query for query in queries if "eveuniverse_eveentity" in query["sql"]
+        ]
+        self.assertLessEqual(len(entity_queries), 3)
+
+    @patch(EVEUNIVERSE_MANAGERS_PATH + ".EveEntityQuerySet.update_from_esi")
+    def test_should_resolve_new_entities_in_chunks(
+        self, mock_update_from_esi, mock_esi
+    ):
+        # given
+        create_contacts_set(include_assoc=False)
+        affiliations = [
+            {"character_id": 90000000 + num, "corporation_id": 98000000 + num}
+            for num in range(600)
+        ]
+        # when
+        CharacterAffiliation.objects._store_affiliations(affiliations)
+        # then
+        self.assertEqual(CharacterAffiliation.objects.count(), 600)
+        self.assertEqual(mock_update_from_esi.call_count, 3)
+
+    def test_should_not_fetch_fresh_assocs(self, mock_esi):
+        # given
+        create_contacts_set(include_assoc=True)
+        CharacterAffiliation.objects.update(last_checked=now())
+        # when
+        CharacterAffiliation.objects.update_from_esi()
+        # then
+        fetched_ids = set()
+        for (
+            _,
+            kwargs,
+        ) in mock_esi.client.Character.post_characters_affiliation.call_args_list:
+            fetched_ids |= set(kwargs["characters"])
+        self.assertFalse(
+            fetched_ids & set(CharacterAffiliation.objects.values_list("pk", flat=True))
+        )
+
+    def test_should_record_last_checked_for_unchanged_assocs(self, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            esi_post_characters_affiliation
+        )
+        create_contacts_set(include_assoc=True)
+        # when
+        CharacterAffiliation.objects.update_from_esi()
+        # then
+        self.assertFalse(
+            CharacterAffiliation.objects.filter(last_checked__isnull=True).exists()
+        )
+
+    @patch(MANAGERS_PATH + ".SR_AFFILIATIONS_MAX_PER_RUN", 3)
+    @patch(MANAGERS_PATH + ".SR_AFFILIATIONS_STALE_HOURS", 24)
+    def test_should_fetch_pending_then_new_then_oldest_stale_assocs(self, mock_esi):
+        # given
+        create_contacts_set(include_assoc=True)
+        CharacterAffiliation.objects.update(last_checked=now())
+        CharacterAffiliation.objects.filter(character_id=1003).update(
+            last_checked=now() - timedelta(hours=48)
+        )
+        CharacterAffiliation.objects.filter(character_id=1004).update(
+            last_checked=now() - timedelta(hours=72)
+        )
+        CharacterAffiliation.objects.filter(character_id=1005).delete()
+        StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+        )
+        # when
+        result = CharacterAffiliation.objects._character_ids_to_fetch(
+            [1001, 1002, 1003, 1004, 1005]
+        )
+        # then
+        self.assertListEqual(result, [1002, 1005, 1004])
+
+    def test_should_store_affiliations_without_alliance(self, mock_esi):
+        # given
+        create_contacts_set(include_assoc=False)
+        affiliations = [
+            {"character_id": 1001, "corporation_id": 2001, "alliance_id": 3001},
+            {"character_id": 1002, "corporation_id": 2001},
+        ]
+        # when
+        CharacterAffiliation.objects._store_affiliations(affiliations)
+        # then
+        assoc = CharacterAffiliation.objects.get(character_id=1002)
+        self.assertEqual(assoc.corporation_id, 2001)
+        self.assertIsNone(assoc.alliance)
+
+    @patch(MANAGERS_PATH + ".sleep")
+    def test_should_handle_exception_from_api(self, mock_sleep, mock_esi):
         # given
         mock_esi.client.Character.post_characters_affiliation.side_effect = HTTPError(
-            Mock()
+            Mock(status_code=502)
         )
         create_contacts_set(include_assoc=False)
         # when
         CharacterAffiliation.objects.update_from_esi()
+        # then
+        self.assertFalse(CharacterAffiliation.objects.exists())
+        self.assertEqual(mock_sleep.call_count, 3)
+
+    @patch(MANAGERS_PATH + ".sleep")
+    def test_should_retry_failed_chunk(self, mock_sleep, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = [
+            HTTPError(Mock(status_code=420)),
+            esi_post_characters_affiliation([1001, 1002]),
+        ]
+        # when
+        result = CharacterAffiliation.objects._fetch_characters_affiliation_from_esi(
+            [1001, 1002]
+        )
+        # then
+        self.assertSetEqual({obj["character_id"] for obj in result}, {1001, 1002})
+        mock_sleep.assert_called_once_with(1)
+
+    @patch(MANAGERS_PATH + ".sleep")
+    def test_should_not_retry_client_errors(self, mock_sleep, mock_esi):
+        # given
+        mock_esi.client.Character.post_characters_affiliation.side_effect = HTTPError(
+            Mock(status_code=404)
+        )
+        # when
+        result = CharacterAffiliation.objects._fetch_characters_affiliation_from_esi(
+            [1001, 1002]
+        )
+        # then
+        self.assertListEqual(result, [])
+        self.assertEqual(
+            mock_esi.client.Character.post_characters_affiliation.call_count, 1
+        )
+        self.assertFalse(mock_sleep.called)
+
+    @patch(MANAGERS_PATH + ".CharacterAffiliationManager.CHUNK_SIZE", 1)
+    @patch(MANAGERS_PATH + ".sleep")
+    def test_should_store_affiliations_of_successful_chunks(self, mock_sleep, mock_esi):
+        # given
+        def my_post_characters_affiliation(characters, *args, **kwargs):
+            if characters == [1001]:
+                raise HTTPError(Mock(status_code=500))
+            return esi_post_characters_affiliation(characters)
+
+        mock_esi.client.Character.post_characters_affiliation.side_effect = (
+            my_post_characters_affiliation
+        )
+        create_contacts_set(include_assoc=True)
+        assoc = CharacterAffiliation.objects.get(character_id=1002)
+        assoc.corporation = EveEntity.objects.get(id=2003)
+        assoc.save()
+        # when
+        CharacterAffiliation.objects.update_from_esi()
+        # then
+        self.assertTrue(CharacterAffiliation.objects.filter(character_id=1001).exists())
+        assoc.refresh_from_db()
+        self.assertEqual(assoc.corporation_id, 2001)
 
     def test_should_add_new_eve_character_relations(self, mock_esi):
         # given
@@ -544,6 +1516,37 @@ class TestCharacterAffiliationsManager(NoSocketsTestCase):
         assoc = CharacterAffiliation.objects.get(character_id=1001)
         self.assertEqual(assoc.eve_character, eve_character_1001)
 
+    def test_should_clear_relations_to_characters_no_longer_in_auth(self, mock_esi):
+        # given
+        create_contacts_set(include_assoc=True)
+        eve_character_1001 = create_entity(EveCharacter, 1001)
+        CharacterAffiliation.objects.filter(character_id=1001).update(
+            eve_character=eve_character_1001
+        )
+        EveCharacter.objects.filter(pk=eve_character_1001.pk).update(character_id=1099)
+        # when
+        CharacterAffiliation.objects.update_evecharacter_relations()
+        # then
+        assoc = CharacterAffiliation.objects.get(character_id=1001)
+        self.assertIsNone(assoc.eve_character)
+
+    def test_should_update_changed_relations_only_with_one_query(self, mock_esi):
+        # given
+        create_contacts_set(include_assoc=True)
+        create_entity(EveCharacter, 1001)
+        create_entity(EveCharacter, 1002)
+        CharacterAffiliation.objects.update_evecharacter_relations()
+        create_entity(EveCharacter, 1003)
+        # when
+        with CaptureQueriesContext(connection) as queries:
+            result = CharacterAffiliation.objects.update_evecharacter_relations()
+        # then
+        self.assertEqual(result, 1)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(
+            CharacterAffiliation.objects.filter(eve_character__isnull=False).count(), 3
+        )
+
 
 @patch(MANAGERS_PATH + ".esi")
 class TestCorporationDetailsManager(NoSocketsTestCase):
@@ -552,7 +1555,8 @@ class TestCorporationDetailsManager(NoSocketsTestCase):
         super().setUpClass()
         load_eve_entities()
 
-    def test_should_update_corporations(self, mock_esi):
+    @patch(EVEUNIVERSE_MANAGERS_PATH + ".EveEntityQuerySet.update_from_esi")
+    def test_should_update_corporations(self, mock_update_from_esi, mock_esi):
         # given
         mock_Corporation = mock_esi.client.Corporation
         mock_Corporation.get_corporations_corporation_id.side_effect = (
@@ -568,3 +1572,5 @@ class TestCorporationDetailsManager(NoSocketsTestCase):
         self.assertEqual(obj.member_count, 3)
         self.assertEqual(obj.ticker, "WYT")
         self.assertIsNone(obj.faction)
+        self.assertTrue(EveEntity.objects.filter(id=2987).exists())
+        self.assertTrue(mock_update_from_esi.called)
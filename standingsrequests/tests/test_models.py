@@ -75,6 +75,28 @@ class TestContactSet(NoSocketsTestCase):
         self.assertFalse(MainOrganizations.is_character_a_member(self.character_1001))
 
 
+class TestContactSetChangedContactIds(NoSocketsTestCase):
+    def test_should_return_ids_of_added_removed_and_changed_contacts(self):
+        # given
+        set_1 = create_contacts_set()
+        set_2 = create_contacts_set()
+        set_2.contacts.filter(eve_entity_id=1001).update(standing=-10)
+        set_2.contacts.filter(eve_entity_id=1002).delete()
+        Contact.objects.create(contact_set=set_2, eve_entity_id=1007, standing=5)
+        # when
+        result = set_2.changed_contact_ids(set_1)
+        # then
+        self.assertSetEqual(result, {1001, 1002, 1007})
+
+    def test_should_return_empty_set_when_nothing_changed(self):
+        # given
+        set_1 = create_contacts_set()
+        set_2 = create_contacts_set()
+        # when/then
+        self.assertSetEqual(set_2.changed_contact_ids(set_1), set())
+        self.assertSetEqual(set_1.changed_contact_ids(set_1), set())
+
+
 class TestContactSetCreateStanding(NoSocketsTestCase):
     @classmethod
     def setUpClass(cls):
@@ -155,6 +177,24 @@ class TestContactSetGenerateStandingRequestsForBlueAlts(TestCase):
         req.refresh_from_db()
         self.assertFalse(req.is_effective)
 
+    def test_should_create_request_for_blue_alt_with_request_from_previous_owner(
+        self,
+    ):
+        # given
+        alt_id = 1010
+        alt = create_entity(EveCharacter, alt_id)
+        add_character_to_user(self.user, alt, scopes=["dummy"])
+        previous_owner = AuthUtils.create_member("Lex Luthor")
+        StandingRequest.objects.get_or_create_2(
+            previous_owner, alt_id, StandingRequest.CHARACTER_CONTACT_TYPE
+        )
+        # when
+        result = self.contacts_set.generate_standing_requests_for_blue_alts()
+        # then
+        self.assertEqual(result, 1)
+        request = StandingRequest.objects.get(contact_id=alt_id, user=self.user)
+        self.assertTrue(request.is_effective)
+
     def test_should_not_create_requests_for_non_blue_alts(self):
         # given
         alt_id = 1009
@@ -175,6 +215,33 @@ class TestContactSetGenerateStandingRequestsForBlueAlts(TestCase):
         # then
         self.assertFalse(StandingRequest.objects.filter(contact_id=alt_id).exists())
 
+    def test_should_not_create_requests_for_blue_alt_with_pending_revocation(self):
+        # given
+        alt_id = 1010
+        alt = create_entity(EveCharacter, alt_id)
+        add_character_to_user(self.user, alt, scopes=["dummy"])
+        StandingRevocation.objects.add_revocation(
+            alt_id, StandingRevocation.CHARACTER_CONTACT_TYPE, user=self.user
+        )
+        # when
+        self.contacts_set.generate_standing_requests_for_blue_alts()
+        # then
+        self.assertFalse(StandingRequest.objects.filter(contact_id=alt_id).exists())
+
+    def test_should_return_count_of_generated_requests(self):
+        # given
+        for alt_id in [1009, 1010, 1110]:
+            alt = create_entity(EveCharacter, alt_id)
+            add_character_to_user(self.user, alt, scopes=["dummy"])
+        # when
+        result = self.contacts_set.generate_standing_requests_for_blue_alts()
+        # then
+        self.assertEqual(result, 2)
+        self.assertSetEqual(
+            set(StandingRequest.objects.values_list("contact_id", flat=True)),
+            {1010, 1110},
+        )
+
 
 class TestAbstractStandingsRequest(TestCase):
     @classmethod
@@ -355,6 +422,21 @@ class TestStandingsRequest(TestCase):
         self.assertIsNone(my_request.action_by)
         self.assertIsNone(my_request.action_date)
 
+    def test_check_standing_actioned_timeout_after_deadline_for_verified_set(self):
+        contact_set = ContactSet.objects.current()
+        contact_set.date = now() - timedelta(hours=30)
+        contact_set.verified_at = now()
+        contact_set.save()
+        my_request = StandingRequest.objects.create(
+            user=self.user_requestor,
+            contact_id=1001,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_by=self.user_manager,
+            action_date=now() - timedelta(hours=25),
+            is_effective=False,
+        )
+        self.assertEqual(my_request.check_actioned_timeout(), self.user_manager)
+
     def test_check_standing_actioned_timeout_before_deadline(self):
         my_request = StandingRequest(
             user=self.user_requestor,
@@ -568,6 +650,27 @@ class TestStandingsRequestClassMethods(NoSocketsTestCase):
         user_2 = AuthUtils.create_user("Mike Myers")
         self.assertFalse(StandingRequest.can_request_corporation_standing(2001, user_2))
 
+    @patch(MODELS_PATH + ".SR_REQUIRED_SCOPES", {"Guest": ["publicData"]})
+    @patch(MODELS_PATH + ".EveCorporation.get_many_by_id")
+    def test_should_fetch_missing_corporations_at_once(self, mock_get_many_by_id):
+        # given
+        mock_get_many_by_id.return_value = [
+            EveCorporation(**get_my_test_data()["EveCorporationInfo"]["2001"]),
+            None,
+        ]
+        user = AuthUtils.create_user("John Doe")
+        for character_id, character in get_my_test_data()["EveCharacter"].items():
+            if character["corporation_id"] == 2001:
+                my_character = EveCharacter.objects.create(**character)
+                add_character_to_user(user, my_character, scopes=["publicData"])
+        # when
+        result = StandingRequest.corporation_requests_with_all_member_tokens(
+            [(user.pk, 2001), (user.pk, 2002)]
+        )
+        # then
+        self.assertSetEqual(result, {(user.pk, 2001)})
+        mock_get_many_by_id.assert_called_once_with({2001, 2002})
+
 
 class TestStandingsRequestGetRequiredScopesForState(NoSocketsTestCase):
     @patch(MODELS_PATH + ".SR_REQUIRED_SCOPES", {"member": ["abc"]})
@@ -0,0 +1,208 @@
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from allianceauth.authentication.models import CharacterOwnership
+from allianceauth.eveonline.models import EveCharacter
+from allianceauth.tests.auth_utils import AuthUtils
+from app_utils.testing import NoSocketsTestCase, add_character_to_user
+
+from ..models import StandingRequest
+from .entity_type_ids import CHARACTER_TYPE_ID, CORPORATION_TYPE_ID
+from .my_test_data import create_eve_objects
+
+MODULE_PATH = "standingsrequests.signals"
+
+
+@patch(MODULE_PATH + ".validate_requests_for_users")
+@patch(MODULE_PATH + ".transaction")
+class TestIncrementalValidation(NoSocketsTestCase):
+    def setUp(self):
+        create_eve_objects()
+        self.user = AuthUtils.create_member("Bruce Wayne")
+        self.character = EveCharacter.objects.get(character_id=1001)
+        add_character_to_user(self.user, self.character, scopes=["publicData"])
+        StandingRequest.objects.create(
+            user=self.user, contact_id=1001, contact_type_id=CHARACTER_TYPE_ID
+        )
+
+    def test_should_validate_requests_when_token_is_deleted(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        # when
+        self.user.token_set.all().delete()
+        # then
+        mock_validate_requests_for_users.delay.assert_called_with([self.user.pk])
+
+    def test_should_validate_requests_of_previous_owner_with_corporation_request(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        StandingRequest.objects.create(
+            user=self.user, contact_id=2001, contact_type_id=CORPORATION_TYPE_ID
+        )
+        user_2 = AuthUtils.create_member("Clark Kent")
+        # when
+        CharacterOwnership.objects.filter(character=self.character).update(user=user_2)
+        ownership = CharacterOwnership.objects.get(character=self.character)
+        ownership.save()
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with([self.user.pk])
+
+    def test_should_validate_requests_when_ownership_is_deleted(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        # when
+        CharacterOwnership.objects.filter(character=self.character).delete()
+        # then
+        mock_validate_requests_for_users.delay.assert_called_with([self.user.pk])
+
+    def test_should_validate_requests_when_groups_change(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        group = Group.objects.create(name="Dummy")
+        # when
+        self.user.groups.add(group)
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with([self.user.pk])
+
+    def test_should_validate_requests_when_users_are_removed_from_group(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        group = Group.objects.create(name="Dummy")
+        self.user.groups.add(group)
+        mock_validate_requests_for_users.reset_mock()
+        is_member_when_validated = []
+        mock_validate_requests_for_users.delay.side_effect = (
+            lambda user_ids: is_member_when_validated.append(
+                self.user.groups.filter(pk=group.pk).exists()
+            )
+        )
+        # when
+        group.user_set.clear()
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with([self.user.pk])
+        self.assertListEqual(is_member_when_validated, [False])
+
+    def test_should_validate_requests_when_state_changes(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        state = AuthUtils.create_state("Standings Test", 75)
+        state.permissions.add(
+            AuthUtils.get_permission_by_name(StandingRequest.REQUEST_PERMISSION_NAME)
+        )
+        # when
+        self.user.profile.assign_state(state)
+        # then
+        mock_validate_requests_for_users.delay.assert_called_with([self.user.pk])
+
+    def test_should_not_validate_requests_for_users_without_requests(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        user_2 = AuthUtils.create_member("Clark Kent")
+        group = Group.objects.create(name="Dummy")
+        # when
+        user_2.groups.add(group)
+        # then
+        self.assertFalse(mock_validate_requests_for_users.delay.called)
+
+    @patch(MODULE_PATH + ".SR_INCREMENTAL_VALIDATION_ENABLED", False)
+    def test_should_do_nothing_when_disabled(
+        self, mock_transaction, mock_validate_requests_for_users
+    ):
+        # given
+        mock_transaction.on_commit.side_effect = lambda func: func()
+        group = Group.objects.create(name="Dummy")
+        # when
+        self.user.groups.add(group)
+        # then
+        self.assertFalse(mock_validate_requests_for_users.delay.called)
+
+
+@patch(MODULE_PATH + ".validate_requests_for_users")
+class TestIncrementalValidationOnCommit(TransactionTestCase):
+    def setUp(self):
+        create_eve_objects()
+        self.user = AuthUtils.create_member("Bruce Wayne")
+        self.user = AuthUtils.add_permission_to_user_by_name(
+            StandingRequest.REQUEST_PERMISSION_NAME, self.user
+        )
+        self.character = EveCharacter.objects.get(character_id=1001)
+        add_character_to_user(self.user, self.character, scopes=["publicData"])
+        StandingRequest.objects.create(
+            user=self.user, contact_id=1001, contact_type_id=CHARACTER_TYPE_ID
+        )
+
+    def test_should_validate_requests_after_group_was_cleared(
+        self, mock_validate_requests_for_users
+    ):
+        # given
+        group = Group.objects.create(name="Dummy")
+        self.user.groups.add(group)
+        mock_validate_requests_for_users.reset_mock()
+        is_member_when_validated = []
+        mock_validate_requests_for_users.delay.side_effect = (
+            lambda user_ids: is_member_when_validated.append(
+                self.user.groups.filter(pk=group.pk).exists()
+            )
+        )
+        # when
+        group.user_set.clear()
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with([self.user.pk])
+        self.assertListEqual(is_member_when_validated, [False])
+
+    def test_should_validate_requests_once_per_transaction(
+        self, mock_validate_requests_for_users
+    ):
+        # given
+        add_character_to_user(
+            self.user, EveCharacter.objects.get(character_id=1002), scopes=["dummy"]
+        )
+        user_2 = AuthUtils.create_member("Clark Kent")
+        StandingRequest.objects.create(
+            user=user_2, contact_id=1003, contact_type_id=CHARACTER_TYPE_ID
+        )
+        group = Group.objects.create(name="Dummy")
+        mock_validate_requests_for_users.reset_mock()
+        # when
+        with transaction.atomic():
+            self.user.token_set.all().delete()
+            user_2.groups.add(group)
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with(
+            sorted([self.user.pk, user_2.pk])
+        )
+
+    def test_should_validate_requests_after_rolled_back_transaction(
+        self, mock_validate_requests_for_users
+    ):
+        # given
+        group = Group.objects.create(name="Dummy")
+        mock_validate_requests_for_users.reset_mock()
+        try:
+            with transaction.atomic():
+                self.user.groups.add(group)
+                raise RuntimeError()
+        except RuntimeError:
+            pass
+        # when
+        with transaction.atomic():
+            self.user.groups.add(group)
+        # then
+        mock_validate_requests_for_users.delay.assert_called_once_with([self.user.pk])
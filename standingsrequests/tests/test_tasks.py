@@ -1,14 +1,18 @@
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import override_settings
 from django.utils.timezone import now
 
+from allianceauth.notifications.models import Notification
+from allianceauth.tests.auth_utils import AuthUtils
 from app_utils.testing import NoSocketsTestCase
 
 from .. import tasks
-from ..models import ContactSet
-from .my_test_data import create_contacts_set
+from ..models import ContactSet, StandingRequest, StandingRevocation, TaskRun
+from .entity_type_ids import CHARACTER_TYPE_ID
+from .my_test_data import create_contacts_set, create_standings_char
 
 MODULE_PATH = "standingsrequests.tasks"
 
@@ -17,6 +21,9 @@ MODULE_PATH = "standingsrequests.tasks"
 @patch(MODULE_PATH + ".StandingRevocation.objects.process_requests")
 @patch(MODULE_PATH + ".ContactSet.objects.create_new_from_api")
 class TestStandingsUpdate(NoSocketsTestCase):
+    def setUp(self):
+        cache.clear()
+
     def test_can_update_standings(
         self,
         mock_create_new_from_api,
@@ -40,6 +47,196 @@ class TestStandingsUpdate(NoSocketsTestCase):
         self.assertFalse(mock_requests_process_standings.called)
         self.assertFalse(mock_revocations_process_standings.called)
 
+    def test_should_process_only_requests_for_changed_contacts(
+        self,
+        mock_create_new_from_api,
+        mock_requests_process_standings,
+        mock_revocations_process_standings,
+    ):
+        # given
+        new_set = create_contacts_set()
+        new_set.contacts.filter(eve_entity_id=1001).update(standing=-10)
+        previous_set = create_contacts_set()
+        mock_create_new_from_api.return_value = new_set
+        # when
+        tasks.standings_update()
+        # then
+        args, _ = mock_requests_process_standings.call_args
+        self.assertEqual(args, ({1001}, previous_set.last_verified))
+        args, _ = mock_revocations_process_standings.call_args
+        self.assertEqual(args, ({1001}, previous_set.last_verified))
+
+    def test_should_process_all_requests_without_previous_contact_set(
+        self,
+        mock_create_new_from_api,
+        mock_requests_process_standings,
+        mock_revocations_process_standings,
+    ):
+        # when
+        tasks.standings_update()
+        # then
+        args, _ = mock_requests_process_standings.call_args
+        self.assertEqual(args, (None, None))
+
+
+@override_settings(CELERY_ALWAYS_EAGER=True)
+@patch(MODULE_PATH + ".SR_SYNC_BLUE_ALTS_ENABLED", False)
+@patch(MODULE_PATH + ".ContactSet.objects.create_new_from_api")
+class TestStandingsUpdateProcessRequests(NoSocketsTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = AuthUtils.create_user("Roger Requestor")
+        create_standings_char()
+        # becomes effective
+        for contact_id in [1001, 1003, 1010]:
+            StandingRequest.objects.create(
+                user=self.user,
+                contact_id=contact_id,
+                contact_type_id=CHARACTER_TYPE_ID,
+                action_date=now(),
+            )
+        # no longer effective
+        StandingRequest.objects.create(
+            user=self.user,
+            contact_id=1009,
+            contact_type_id=CHARACTER_TYPE_ID,
+            is_effective=True,
+            effective_date=now(),
+        )
+        # revocation satisfied
+        StandingRequest.objects.create(
+            user=self.user,
+            contact_id=1005,
+            contact_type_id=CHARACTER_TYPE_ID,
+            is_effective=True,
+            effective_date=now(),
+        )
+        StandingRevocation.objects.add_revocation(
+            1005, StandingRevocation.CHARACTER_CONTACT_TYPE, user=self.user
+        )
+
+    def _assert_requests_processed(self):
+        self.assertSetEqual(
+            set(
+                StandingRequest.objects.filter(is_effective=True).values_list(
+                    "contact_id", flat=True
+                )
+            ),
+            {1001, 1003, 1010},
+        )
+        self.assertFalse(StandingRequest.objects.filter(is_effective=False).exists())
+        self.assertFalse(StandingRevocation.objects.exists())
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 5)
+
+    @patch(MODULE_PATH + ".SR_PROCESS_REQUESTS_SHARDS", 1)
+    def test_should_process_requests_serially(self, mock_create_new_from_api):
+        # given
+        mock_create_new_from_api.side_effect = create_contacts_set
+        # when
+        tasks.standings_update()
+        # then
+        self._assert_requests_processed()
+
+    @patch(MODULE_PATH + ".SR_PROCESS_REQUESTS_SHARDS", 3)
+    def test_should_process_requests_in_shards(self, mock_create_new_from_api):
+        # given
+        mock_create_new_from_api.side_effect = create_contacts_set
+        # when
+        tasks.standings_update()
+        # then
+        self._assert_requests_processed()
+
+    @patch(MODULE_PATH + ".SR_PROCESS_REQUESTS_SHARDS", 3)
+    @patch(MODULE_PATH + ".logger")
+    def test_should_report_completion_after_last_shard(
+        self, mock_logger, mock_create_new_from_api
+    ):
+        # given
+        mock_create_new_from_api.side_effect = create_contacts_set
+        # when
+        tasks.standings_update()
+        # then
+        completed_calls = [
+            call
+            for call in mock_logger.info.call_args_list
+            if call[0][0].startswith("Completed processing requests")
+        ]
+        self.assertEqual(len(completed_calls), 1)
+        run_id = completed_calls[0][0][1]
+        self.assertEqual(completed_calls[0][0][3], 5)
+        self.assertIsNone(cache.get(tasks._sharded_run_key(run_id, "remaining")))
+
+    def test_should_process_shard_of_run_no_longer_tracked(
+        self, mock_create_new_from_api
+    ):
+        # given
+        create_contacts_set()
+        # when
+        tasks.process_requests_shard(None, None, run_id="unknown")
+        # then
+        self._assert_requests_processed()
+
+    @patch(MODULE_PATH + ".SR_PROCESS_REQUESTS_SHARDS", 3)
+    def test_should_process_only_changed_contacts_in_shards(
+        self, mock_create_new_from_api
+    ):
+        # given
+        create_contacts_set()
+        new_request = StandingRequest.objects.create(
+            user=self.user,
+            contact_id=1002,
+            contact_type_id=CHARACTER_TYPE_ID,
+            action_date=now(),
+        )
+
+        def create_new_from_api():
+            new_set = create_contacts_set()
+            new_set.contacts.filter(eve_entity_id=1003).update(standing=10)
+            return new_set
+
+        mock_create_new_from_api.side_effect = create_new_from_api
+        # when
+        tasks.standings_update()
+        # then
+        new_request.refresh_from_db()
+        self.assertTrue(new_request.is_effective)
+        self.assertTrue(StandingRequest.objects.get(contact_id=1003).is_effective)
+        self.assertFalse(StandingRequest.objects.get(contact_id=1001).is_effective)
+
+    def test_should_send_notifications_from_shard(self, mock_create_new_from_api):
+        # given
+        create_contacts_set()
+        # when
+        tasks.process_requests_shard(None, 1004)
+        # then
+        self.assertSetEqual(
+            set(
+                StandingRequest.objects.filter(is_effective=True).values_list(
+                    "contact_id", flat=True
+                )
+            ),
+            {1001, 1003, 1005, 1009},
+        )
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    @patch(MODULE_PATH + ".SR_PROCESS_REQUESTS_SHARDS", 1)
+    def test_should_process_all_requests(self, mock_create_new_from_api):
+        # given
+        create_contacts_set()
+        # when
+        tasks.process_all_requests()
+        # then
+        self._assert_requests_processed()
+
+    def test_should_not_process_requests_without_standings(
+        self, mock_create_new_from_api
+    ):
+        # when
+        tasks.process_all_requests()
+        # then
+        self.assertTrue(StandingRequest.objects.get(contact_id=1009).is_effective)
+        self.assertFalse(Notification.objects.exists())
+
 
 class TestOtherTasks(NoSocketsTestCase):
     @patch(MODULE_PATH + ".StandingRequest.objects.validate_requests")
@@ -47,6 +244,25 @@ class TestOtherTasks(NoSocketsTestCase):
         tasks.validate_requests()
         self.assertTrue(mock_validate_standings_requests.called)
 
+    @patch(MODULE_PATH + ".StandingRequest.objects.validate_requests")
+    def test_validate_requests_for_users(self, mock_validate_standings_requests):
+        # when
+        tasks.validate_requests_for_users([1, 2])
+        # then
+        args, _ = mock_validate_standings_requests.call_args
+        self.assertEqual(args, ([1, 2],))
+
+    @patch(MODULE_PATH + ".StandingRevocation.objects.reset_timed_out")
+    @patch(MODULE_PATH + ".StandingRequest.objects.reset_timed_out")
+    def test_reset_timed_out_requests(
+        self, mock_requests_reset_timed_out, mock_revocations_reset_timed_out
+    ):
+        # when
+        tasks.reset_timed_out_requests()
+        # then
+        self.assertTrue(mock_requests_reset_timed_out.called)
+        self.assertTrue(mock_revocations_reset_timed_out.called)
+
     @override_settings(CELERY_ALWAYS_EAGER=True)
     @patch(MODULE_PATH + ".CorporationDetails.objects.update_or_create_from_esi")
     @patch(MODULE_PATH + ".CharacterAffiliation.objects.update_evecharacter_relations")
@@ -68,10 +284,39 @@ class TestOtherTasks(NoSocketsTestCase):
 
 @override_settings(CELERY_ALWAYS_EAGER=True)
 class TestPurgeTasks(NoSocketsTestCase):
+    @patch(MODULE_PATH + ".purge_stale_task_runs")
     @patch(MODULE_PATH + ".purge_stale_standings_data")
-    def test_purge_stale_data(self, mock_purge_stale_standings_data):
+    def test_purge_stale_data(
+        self, mock_purge_stale_standings_data, mock_purge_stale_task_runs
+    ):
         tasks.purge_stale_data.delay()
         self.assertTrue(mock_purge_stale_standings_data.si.called)
+        self.assertTrue(mock_purge_stale_task_runs.si.called)
+
+    @patch(MODULE_PATH + ".SR_TASK_RUNS_STALE_DAYS", 30)
+    def test_purge_stale_task_runs(self):
+        # given
+        params = {
+            "name": "dummy",
+            "is_success": True,
+            "duration": 1,
+            "db_queries": 1,
+            "db_time": 1,
+            "esi_calls": 0,
+            "esi_time": 0,
+            "rows_written": 0,
+        }
+        old_run = TaskRun.objects.create(
+            started_at=now() - timedelta(days=31), **params
+        )
+        new_run = TaskRun.objects.create(
+            started_at=now() - timedelta(days=29), **params
+        )
+        # when
+        tasks.purge_stale_task_runs()
+        # then
+        self.assertFalse(TaskRun.objects.filter(pk=old_run.pk).exists())
+        self.assertTrue(TaskRun.objects.filter(pk=new_run.pk).exists())
 
 
 @patch(MODULE_PATH + ".SR_STANDINGS_STALE_HOURS", 48)
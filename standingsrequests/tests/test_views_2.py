@@ -17,6 +17,7 @@ from app_utils.testing import (
     add_character_to_user,
     json_response_to_dict,
     json_response_to_python,
+    response_text,
 )
 
 from .. import views
@@ -433,6 +434,17 @@ class TestViewsBasics(TestViewPagesBase):
         response = views.view_pilots_standings(request)
         self.assertEqual(response.status_code, 200)
 
+    def test_should_show_pilots_count_from_current_handle(self, mock_esi):
+        # given
+        request = self.factory.get(reverse("standingsrequests:view_pilots"))
+        request.user = self.user_manager
+        contacts_count = self.contact_set.contacts.count()
+        # when
+        response = views.view_pilots_standings(request)
+        # then
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f"({contacts_count})", response_text(response))
+
     def test_user_can_open_groups_standing(self, mock_esi):
         request = self.factory.get(reverse("standingsrequests:view_groups"))
         request.user = self.user_manager
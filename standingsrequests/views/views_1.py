@@ -59,7 +59,7 @@ def create_requests(request):
 def request_characters(request):
     logger.debug("Start request_characters request")
     try:
-        contact_set = ContactSet.objects.latest()
+        contact_set = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         return render(
             request, "standingsrequests/error.html", add_common_context(request, {})
@@ -69,14 +69,7 @@ def request_characters(request):
         character_ownership__user=request.user
     ).select_related("character_ownership__user")
     eve_characters = {obj.character_id: obj for obj in eve_characters_qs}
-    characters_with_standing = {
-        contact["eve_entity_id"]: contact["standing"]
-        for contact in (
-            contact_set.contacts.filter(
-                eve_entity_id__in=list(eve_characters.keys())
-            ).values("eve_entity_id", "standing")
-        )
-    }
+    characters_with_standing = contact_set.contact_standings(eve_characters.keys())
     characters_standings_requests = {
         obj.contact_id: obj
         for obj in (
@@ -143,7 +136,7 @@ def request_characters(request):
 def request_corporations(request):
     logger.debug("Start request_characters request")
     try:
-        contact_set = ContactSet.objects.latest()
+        contact_set = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         return render(
             request, "standingsrequests/error.html", add_common_context(request, {})
@@ -34,13 +34,17 @@ logger = LoggerAddTag(get_extension_logger(__name__), __title__)
 def view_pilots_standings(request):
     logger.debug("view_pilot_standings called by %s", request.user)
     try:
-        contact_set = ContactSet.objects.latest()
+        contact_set = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contact_set = None
     finally:
         organization = BaseConfig.standings_source_entity()
-        last_update = contact_set.date if contact_set else None
-        pilots_count = contact_set.contacts.count() if contact_set else None
+        last_update = contact_set.last_verified if contact_set else None
+        pilots_count = (
+            ContactSet.objects.current_handle()["contacts_count"]
+            if contact_set
+            else None
+        )
 
     context = {
         "lastUpdate": last_update,
@@ -59,7 +63,7 @@ def view_pilots_standings(request):
 @permission_required("standingsrequests.view")
 def view_pilots_standings_json(request):
     try:
-        contacts = ContactSet.objects.latest()
+        contacts = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contacts = ContactSet()
 
@@ -144,7 +148,7 @@ def download_pilot_standings(request):
     response["Content-Disposition"] = 'attachment; filename="standings.csv"'
     writer = UnicodeWriter(response)
     try:
-        contacts = ContactSet.objects.latest()
+        contacts = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contacts = ContactSet()
 
@@ -214,12 +218,12 @@ def download_pilot_standings(request):
 def view_groups_standings(request):
     logger.debug("view_group_standings called by %s", request.user)
     try:
-        contact_set = ContactSet.objects.latest()
+        contact_set = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contact_set = None
     finally:
         organization = BaseConfig.standings_source_entity()
-        last_update = contact_set.date if contact_set else None
+        last_update = contact_set.last_verified if contact_set else None
 
     if contact_set:
         groups_count = (
@@ -247,7 +251,7 @@ def view_groups_standings(request):
 @permission_required("standingsrequests.view")
 def view_groups_standings_json(request):
     try:
-        contacts = ContactSet.objects.latest()
+        contacts = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contacts = ContactSet()
 
@@ -422,7 +426,7 @@ def _compose_standing_requests_data(
         )
     }
     try:
-        contact_set = ContactSet.objects.latest()
+        contact_set = ContactSet.objects.current()
     except ContactSet.DoesNotExist:
         contacts = dict()
     else:
@@ -543,10 +547,9 @@ def manage_requests_write(request, contact_id):
     contact_id = int(contact_id)
     logger.debug("manage_requests_write called by %s", request.user)
     if request.method == "PUT":
-        actioned = 0
-        for r in StandingRequest.objects.filter(contact_id=contact_id):
-            r.mark_actioned(request.user)
-            actioned += 1
+        actioned = StandingRequest.objects.filter(
+            contact_id=contact_id
+        ).bulk_mark_actioned(request.user)
         if actioned > 0:
             return HttpResponseNoContent()
         return Http404()
@@ -579,10 +582,9 @@ def manage_revocations_write(request, contact_id):
         contact_id,
     )
     if request.method == "PUT":
-        actioned = 0
-        for r in StandingRevocation.objects.filter(contact_id=contact_id):
-            r.mark_actioned(request.user)
-            actioned += 1
+        actioned = StandingRevocation.objects.filter(
+            contact_id=contact_id
+        ).bulk_mark_actioned(request.user)
         if actioned > 0:
             return HttpResponseNoContent()
         else:
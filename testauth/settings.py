@@ -147,15 +147,8 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 # Bootstrap messaging css workaround
 MESSAGE_TAGS = {messages.ERROR: "danger"}
 
-CACHES = {
-    "default": {
-        "BACKEND": "redis_cache.RedisCache",
-        "LOCATION": "localhost:6379",
-        "OPTIONS": {
-            "DB": 1,
-        },
-    }
-}
+# local memory cache, so tests do not need Redis. Tests clear it in setUp.
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
 
 DEBUG = True
 ALLOWED_HOSTS = ["*"]
@@ -309,3 +302,6 @@ SR_REQUIRED_SCOPES = {
     "Blue": ["publicData"],
     "": [],  # no state
 }
+
+# tests change contacts of active sets, which a snapshot would not reflect
+SR_STANDINGS_SNAPSHOT_ENABLED = False